@@ -0,0 +1,790 @@
+import re
+import sys
+import os
+import time
+import random
+import tempfile
+import tracemalloc
+import datetime
+import itertools
+import functools
+import array
+import pickle
+import multiprocessing
+import threading
+import json
+import platform
+import subprocess
+
+import sto_loot_parser as stolp
+import sto_loot_store
+
+system_lines = ('You received {n} Dilithium Ore.',
+                'You received {n} Energy Credits.',
+                'You refined {n} Refined Dilithium.',
+                'You sold Mk II Phaser Beam Array [Dmg] for {n} Energy Credits.',
+                'You placed a bet of {n} Energy Credits.',
+                'You won {n} Energy Credits!',
+                "You didn't win any Energy Credits.",
+                'Items acquired: Contraband x {n}',
+                'Item acquired: Gold-Pressed Latinum x {n}',
+                'You discarded Mk X Shield Array.',
+                'You lost {n} Gold-Pressed Latinum.',
+                'Cmdr Example@example has acquired a Tal Shiar Adapted Destroyer!',
+                'Beispiel@beispiel hat einen Jem\'Hadar Vanguard Carrier erhalten!',
+                'Your Duty Officer assignment has completed.')
+
+noise_lines = ('[1,{d}T{t},0,@,@,,,Combat (Self)]Your Phaser Beam Array deals {n} (1500) '
+                    'Phaser Damage(Critical) to Borg Cube.',
+               '[2,{d}T{t},0,Someone@someone,@,,,Zone]Someone: You received my invite?')
+
+paste_noise_lines = ('{d} [Combat (Self)] Your Phaser Beam Array deals {n} (1500) '
+                        'Phaser Damage(Critical) to Borg Cube.',
+                     '{d} [Zone] Someone: You received my invite?')
+
+def generate_log(filename, lines, seed=0, noise=0.9, cp=False):
+    '''
+    Writes a synthetic chatlog. The same seed always gives the same log.
+    Parameters:
+        filename (str): where to write the log
+        lines (int): the number of lines to write
+        seed (int): the random seed, so runs are reproducible
+        noise (float): the fraction of lines that are not System lines
+        cp (bool): whether to write the copy-paste syntax rather
+            than the saved-logfile syntax
+    '''
+    rand = random.Random(seed)
+    stamp = 1430870400
+    with open(filename, 'w', encoding='utf-8') as f:
+        for _ in range(lines):
+            stamp += rand.randrange(3)
+            n = '{:,}'.format(rand.randrange(1, 5000))
+            if cp:
+                d = time.strftime('[%m/%d %H:%M]', time.gmtime(stamp))
+                if rand.random() < noise:
+                    f.write(rand.choice(paste_noise_lines).format(d=d, n=n))
+                else:
+                    f.write('{} [System] '.format(d))
+                    f.write(rand.choice(system_lines).format(n=n))
+            else:
+                d, t = time.strftime('%Y%m%d %H%M%S', time.gmtime(stamp)).split()
+                if rand.random() < noise:
+                    f.write(rand.choice(noise_lines).format(d=d, t=t, n=n))
+                else:
+                    f.write('[0,{}T{},0,Name@,@,,,System]'.format(d, t))
+                    f.write(rand.choice(system_lines).format(n=n))
+            f.write('\n')
+
+def baseline_scan(location):
+    '''
+    Parses a saved chatlog the way container_from_logs originally did,
+    running the full expression against every decoded line.
+    Parameter:
+        location (str): the location of the chatlog
+    Returns:
+        int: the number of lines that matched
+    '''
+    expression = stolp.log_expression.pattern
+    matched = 0
+    with open(location, encoding='utf-8-sig') as f:
+        for line in f:
+            match = re.match(expression, line)
+            if match:
+                stolp.Loot(*match.groups())
+                matched += 1
+    return matched
+
+def startup_time(args, runs=5, cwd=None):
+    '''
+    Times a fresh Python process, taking the best of several runs.
+    Parameters:
+        args (list): the arguments to the interpreter
+        runs (int): how many times to run it
+        cwd (str): the directory to run it in
+    Returns:
+        float: the seconds taken by the fastest run, or None if it failed
+    '''
+    best = None
+    for run in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, *args], cwd=cwd, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+        if result.returncode:
+            return None
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def bench_import(runs=5):
+    '''
+    Prints the time taken to start Python, to import each module, and to
+    print the CLI reports for a small log, run as a script and with -m,
+    each in a fresh process.
+    Parameter:
+        runs (int): how many times to run each, keeping the fastest
+    '''
+    here = os.path.dirname(os.path.abspath(__file__))
+    print('Startup', 'Milliseconds', sep='\t')
+    tests = [('python', ['-c', 'pass'])]
+    tests += [('import '+name, ['-c', 'import '+name])
+              for name in ('sto_loot_parser', 'sto_loot_store', 'sto_loot_parser_gui')]
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'Chat_2015-05-06.log')
+        generate_log(location, 1000)
+        # a script is compiled from source every time it runs, while -m reads
+        # the module's cached bytecode
+        tests.append(('CLI reports', [os.path.join(here, 'sto_loot_parser.py'), location]))
+        tests.append(('CLI reports -m', ['-m', 'sto_loot_parser', location]))
+        for name,args in tests:
+            seconds = startup_time(args, runs, cwd=here)
+            print(name, 'failed' if seconds is None else round(seconds*1000, 1), sep='\t')
+
+def bench_scan(lines):
+    '''
+    Prints parsing throughput, in lines per second, for the
+    original per-line matching and for container_from_logs.
+    Parameter:
+        lines (int): the number of lines in the generated log
+    '''
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'Chat_2015-05-06.log')
+        generate_log(location, lines)
+        start = time.perf_counter()
+        before = baseline_scan(location)
+        before_time = time.perf_counter() - start
+        start = time.perf_counter()
+        after = sum(1 for item in stolp.container_from_logs(location))
+        after_time = time.perf_counter() - start
+    assert before == after
+    print('Scan', 'Lines/sec', sep='\t')
+    print('before', int(lines/before_time), sep='\t')
+    print('after', int(lines/after_time), sep='\t')
+
+def chunked_parse(location):
+    '''
+    Parses a saved chatlog from large bytes chunks, the way parse_log
+    did before it memory-mapped saved logs.
+    Parameter:
+        location (str): the location of the chatlog
+    Returns:
+        Container: the parsed events
+    '''
+    container = stolp.Container()
+    for chunk in stolp.read_chunks(location):
+        stolp.scan_chunk(chunk, container)
+    return container
+
+def bench_read(lines, noise=0.9):
+    '''
+    Prints parsing throughput, in MB per second, for decoded text lines,
+    for bytes chunks and for the memory-mapped file.
+    Parameters:
+        lines (int): the number of lines in the generated log
+        noise (float): the fraction of lines that are not System lines
+    '''
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'Chat_2015-05-06.log')
+        generate_log(location, lines, noise=noise)
+        size = os.path.getsize(location)
+        print('Read ({}% System)'.format(round((1-noise)*100)), 'Events', 'MB/s', sep='\t')
+        for name,parse in (('text lines', baseline_scan), ('chunks', chunked_parse),
+                           ('mapped', stolp.parse_log)):
+            result, seconds = timed(parse, location)
+            events = result if isinstance(result, int) else len(result)
+            print(name, events, round(size/1e6/seconds, 1), sep='\t')
+
+def bench_parallel(lines, files=8, workers=None, cp=False):
+    '''
+    Prints the time taken to parse a directory of chatlogs
+    serially and with a pool of worker processes.
+    Parameters:
+        lines (int): the number of lines in each generated log
+        files (int): the number of logs to generate
+        workers (int): the number of worker processes, or None
+            for one per CPU
+        cp (bool): whether to parse pasted logs, one per character,
+            rather than saved logs
+    '''
+    workers = workers or os.cpu_count()
+    with tempfile.TemporaryDirectory() as dirname:
+        for idx in range(files):
+            name = 'Character{}.txt' if cp else 'Chat_2015-05-{:02}.log'
+            generate_log(os.path.join(dirname, name.format(idx+1)), lines, seed=idx, cp=cp)
+        if cp:
+            location = os.path.join(dirname, 'Character*.txt')
+        else:
+            location = os.path.join(dirname, 'Chat_2015-05-01.log')
+        start = time.perf_counter()
+        serial = stolp.container_from_logs(location, cp=cp)
+        serial_time = time.perf_counter() - start
+        start = time.perf_counter()
+        parallel = stolp.container_from_logs(location, cp=cp, workers=workers)
+        parallel_time = time.perf_counter() - start
+    assert str(serial) == str(parallel)
+    print('Parse pasted' if cp else 'Parse', 'Seconds', sep='\t')
+    print('serial', round(serial_time, 3), sep='\t')
+    print('{} workers'.format(workers), round(parallel_time, 3), sep='\t')
+
+def bench_memory(events):
+    '''
+    Prints the memory used per event by a list of Loot objects
+    and by a Container's LootTable.
+    Parameter:
+        events (int): the number of events to store
+    '''
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'Chat_2015-05-06.log')
+        generate_log(location, events, noise=0)
+        expression = stolp.log_expression
+        tracemalloc.start()
+        with open(location, encoding='utf-8') as f:
+            loot = [stolp.Loot(*match.groups()) for match in map(expression.match, f) if match]
+        before = tracemalloc.get_traced_memory()[0] / len(loot)
+        del loot
+        tracemalloc.stop()
+        tracemalloc.start()
+        container = stolp.container_from_logs(location)
+        after = tracemalloc.get_traced_memory()[0] / len(container)
+        tracemalloc.stop()
+    print('Storage', 'Bytes/event', sep='\t')
+    print('list', round(before, 1), sep='\t')
+    print('LootTable', round(after, 1), sep='\t')
+
+def bench_loot(events):
+    '''
+    Prints the rate at which Loot objects are built from matched lines,
+    with and without their datetime being looked at.
+    Parameter:
+        events (int): the number of events to build
+    '''
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'Chat_2015-05-06.log')
+        generate_log(location, events, noise=0)
+        with open(location, encoding='utf-8') as f:
+            groups = [match.groups() for match in map(stolp.log_expression.match, f) if match]
+    start = time.perf_counter()
+    loot = [stolp.Loot(*group) for group in groups]
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for item in loot:
+        item.datetime
+    datetime_time = time.perf_counter() - start
+    print('Loot', 'Events/sec', sep='\t')
+    print('timestamp', int(len(loot)/build_time), sep='\t')
+    print('datetime', int(len(loot)/(build_time+datetime_time)), sep='\t')
+
+def build_container(events):
+    '''
+    Builds a Container of at least the given number of events by parsing
+    a generated log and repeatedly extending the result with a copy of
+    itself shifted to later dates.
+    Parameter:
+        events (int): the minimum number of events
+    Returns:
+        Container: the populated Container
+    '''
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'Chat_2015-05-06.log')
+        generate_log(location, min(events, 1000000), noise=0)
+        container = stolp.container_from_logs(location)
+    while len(container) < events:
+        copy = stolp.Container()
+        copy.extend(container)
+        timestamp = copy.bag.timestamp
+        span = timestamp[-1] - timestamp[0] + 1
+        copy.bag.timestamp = array.array('q', (stamp+span for stamp in timestamp))
+        container.extend(copy)
+    return container
+
+queries = (('one day', {'min_date':datetime.datetime(2015, 5, 6, 12),
+                        'max_date':datetime.datetime(2015, 5, 7, 12)}),
+           ('gain_item', {'gain_item':'Dilithium Ore'}),
+           ('item set', {'item':{'Contraband', 'Energy Credits'}}),
+           ('regex', {'gain_item':'^Gold|Latinum$', 'regex':True}),
+           ('min_gain', {'min_gain':4000}))
+
+def bench_filter(events):
+    '''
+    Prints the time taken to select the rows matching several filters.
+    Parameter:
+        events (int): the number of events to search
+    '''
+    container = build_container(events)
+    print('Filter ({} events)'.format(len(container)), 'Rows', 'Milliseconds', sep='\t')
+    start = time.perf_counter()
+    container.bag.build_index()
+    print('build index', len(container), round((time.perf_counter()-start)*1000, 1), sep='\t')
+    for name,filters in queries:
+        start = time.perf_counter()
+        rows = container.bag.select(**filters)
+        print(name, len(rows), round((time.perf_counter()-start)*1000, 1), sep='\t')
+    start = time.perf_counter()
+    counter = container.counter()
+    print('counter', len(counter), round((time.perf_counter()-start)*1000, 1), sep='\t')
+    start = time.perf_counter()
+    container.total_value(gain_item='Dilithium Ore', min_date=datetime.datetime(2015, 5, 6),
+                          max_date=datetime.datetime(2015, 6, 6))
+    print('Dilithium total', 1, round((time.perf_counter()-start)*1000, 1), sep='\t')
+
+def bench_rollup(events):
+    '''
+    Prints the time taken to add up daily totals from the events and
+    to read them from the rollup, and to build the rollup.
+    Parameter:
+        events (int): the number of events to add up
+    '''
+    container = build_container(events)
+    bag = container.bag
+    print('Totals ({} events)'.format(len(container)), 'Days', 'Milliseconds', sep='\t')
+    tests = (('all', {}), ('gain_item', {'gain_item':'Dilithium Ore'}), queries[0])
+    for name,filters in tests:
+        totals = stolp.DailyTotals()
+        seconds = timed(totals.add_rows, bag, bag.select(**filters))[1]
+        print('events '+name, len(totals), round(seconds*1000, 1), sep='\t')
+    seconds = timed(bag.get_rollup)[1]
+    print('build rollup', len(bag.rollup.buckets[False, False]), round(seconds*1000, 1), sep='\t')
+    for name,filters in tests:
+        totals, seconds = timed(container.bucket_totals, False, False, False, filters)
+        print('rollup '+name, len(totals), round(seconds*1000, 1), sep='\t')
+
+def bench_store(lines, files=4):
+    '''
+    Prints the time taken to import chatlogs into a LootStore, to skip
+    them once imported, and to answer queries from the database
+    compared with a Container.
+    Parameters:
+        lines (int): the number of lines in each generated log
+        files (int): the number of logs to generate
+    '''
+    with tempfile.TemporaryDirectory() as dirname:
+        for idx in range(files):
+            generate_log(os.path.join(dirname, 'Chat_2015-05-{:02}.log'.format(idx+1)),
+                         lines, seed=idx)
+        location = os.path.join(dirname, 'Chat_2015-05-01.log')
+        store = sto_loot_store.LootStore(os.path.join(dirname, 'loot.db'))
+        print('Store', 'Seconds', sep='\t')
+        seconds = timed(lambda: list(store.import_logs(location)))[1]
+        print('import', round(seconds, 3), sep='\t')
+        seconds = timed(lambda: list(store.import_logs(location)))[1]
+        print('import again', round(seconds, 3), sep='\t')
+        container = stolp.container_from_logs(location)
+        tests = (('totals', 'totals_by_day', {}),
+                 ('totals gain_item', 'totals_by_day', {'gain_item':'Dilithium Ore'}),
+                 ('counter', 'counter', {}),
+                 ('get_loot interaction', 'get_loot', {'interaction':'placed a bet of'}))
+        print('Query ({} events)'.format(len(store)), 'Container ms', 'Store ms', sep='\t')
+        for name,method,filters in tests:
+            results = []
+            for source in (container, store):
+                query = getattr(source, method)
+                result, seconds = timed(lambda: list(query(**filters)))
+                results.append((result, seconds))
+            assert len(results[0][0]) == len(results[1][0])
+            print(name, *(round(seconds*1000, 1) for result,seconds in results), sep='\t')
+        store.close()
+
+def bench_chain(events):
+    '''
+    Prints the memory and time taken to combine two Containers by
+    copying them into one and by chaining them, and to add up the
+    daily totals of each.
+    Parameter:
+        events (int): the number of events in each Container
+    '''
+    first = build_container(events)
+    second = build_container(events)
+    print('Combine ({} events)'.format(2*events), 'Bytes', 'Milliseconds',
+          'Totals ms', sep='\t')
+    for name in ('copy', 'chain'):
+        tracemalloc.start()
+        start = time.perf_counter()
+        if name == 'copy':
+            combined = stolp.Container()
+            combined.extend(first)
+            combined.extend(second)
+        else:
+            combined = first + second
+        seconds = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        totals = timed(lambda: list(combined.by_day().totals()))[1]
+        print(name, size, round(seconds*1000, 1), round(totals*1000, 1), sep='\t')
+        del combined
+
+def bench_merge(events):
+    '''
+    Prints the time taken to merge two Containers that share half their
+    events, dropping the shared events, compared with appending one to
+    the other, and to merge two that share none.
+    Parameter:
+        events (int): the number of events in each Container
+    '''
+    bag = build_container(events*2).bag
+    def rows(start, stop):
+        part = stolp.Container()
+        part.bag.strings = list(bag.strings)
+        part.bag.codes = dict(bag.codes)
+        for column in bag.columns:
+            setattr(part.bag, column, getattr(bag, column)[start:stop])
+        return part
+    first = rows(0, events)
+    print('Merge ({} events each)'.format(events), 'Events', 'Seconds', sep='\t')
+    tests = (('overlapping', rows(events//2, events*3//2)), ('disjoint', rows(events, events*2)))
+    for name,second in tests:
+        combined = stolp.Container()
+        combined.extend(first)
+        seconds = timed(combined.extend, second)[1]
+        print('extend '+name, len(combined), round(seconds, 3), sep='\t')
+        merged, seconds = timed(stolp.Container.merged, [first, second])
+        print('merge '+name, len(merged), round(seconds, 3), sep='\t')
+
+def bench_save_load(events):
+    '''
+    Prints the time taken to save and load a Container with pickle
+    and with the binary container format.
+    Parameter:
+        events (int): the number of events to store
+    '''
+    container = build_container(events)
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'container.pickle')
+        start = time.perf_counter()
+        with open(location, 'wb') as output:
+            pickle.dump(container, output)
+        pickle_save = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(location, 'rb') as f:
+            pickle.load(f)
+        pickle_load = time.perf_counter() - start
+        location = os.path.join(dirname, 'container.loot')
+        start = time.perf_counter()
+        container.save(location)
+        binary_save = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = stolp.Container.load(location)
+        binary_load = time.perf_counter() - start
+        assert len(loaded) == len(container)
+        del loaded
+    print('Format ({} events)'.format(len(container)), 'Save seconds', 'Load seconds', sep='\t')
+    print('pickle', round(pickle_save, 3), round(pickle_load, 3), sep='\t')
+    print('binary', round(binary_save, 3), round(binary_load, 3), sep='\t')
+
+def bench_export(events):
+    '''
+    Prints the time taken to write each report to a CSV file.
+    Parameter:
+        events (int): the number of events to report on
+    '''
+    container = build_container(events)
+    print('Export ({} events)'.format(len(container)), 'Rows', 'Seconds', 'MB/s', sep='\t')
+    with tempfile.TemporaryDirectory() as dirname:
+        for name in ('totals', 'cumulative', 'winners', 'dabo', 'sessions'):
+            location = os.path.join(dirname, name + '.csv')
+            count, seconds = timed(lambda: stolp.export_report(location,
+                                                               *container.report(name)))
+            size = os.path.getsize(location)
+            print(name, count, round(seconds, 3), round(size/1e6/seconds, 1), sep='\t')
+
+def append_lines(location, count, period, times):
+    '''
+    Appends System lines to a chatlog at a steady rate, like the game does,
+    reporting when each one was written.
+    Parameters:
+        location (str): the chatlog to append to
+        count (int): the number of lines to append
+        period (float): the seconds between lines
+        times (Queue): receives the time each line was written
+    '''
+    with open(location, 'a', encoding='utf-8') as f:
+        for idx in range(count):
+            time.sleep(period)
+            d, t = time.strftime('%Y%m%d %H%M%S').split()
+            f.write('[0,{}T{},0,Name@,@,,,System]You received {} Dilithium Ore.\n'.format(
+                d, t, idx+1))
+            f.flush()
+            times.put(time.time())
+
+def bench_follow(count=20, period=0.25, interval=0.1, idle=2):
+    '''
+    Prints the latency of following a chatlog that another process is
+    writing, and the CPU time used while nothing is being written.
+    Parameters:
+        count (int): the number of lines the writer appends
+        period (float): the seconds between appended lines
+        interval (float): the follower's polling interval
+        idle (float): the seconds to measure idle CPU use for
+    '''
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, time.strftime('Chat_%Y-%m-%d.log'))
+        open(location, 'w').close()
+        follower = stolp.LogFollower(location)
+        stop = threading.Event()
+        timer = threading.Timer(idle, stop.set)
+        timer.start()
+        cpu = time.process_time()
+        for batch in follower.run(interval=interval, stop=stop):
+            pass
+        idle_cpu = time.process_time() - cpu
+        times = multiprocessing.Queue()
+        writer = multiprocessing.Process(target=append_lines,
+                                         args=(location, count, period, times))
+        writer.start()
+        latencies = []
+        follower = stolp.LogFollower(location, from_end=False)
+        stop = threading.Event()
+        for batch in follower.run(interval=interval, stop=stop):
+            now = time.time()
+            latencies.extend(now - times.get() for item in batch)
+            if len(latencies) >= count:
+                stop.set()
+        writer.join()
+    print('Follow', 'Value', sep='\t')
+    print('idle CPU %', round(idle_cpu/idle*100, 2), sep='\t')
+    print('mean latency ms', round(sum(latencies)/len(latencies)*1000, 1), sep='\t')
+    print('max latency ms', round(max(latencies)*1000, 1), sep='\t')
+
+def dst_mismatches(location, year=2015, step=600):
+    '''
+    Writes a log with a System line every few minutes through a year,
+    stamped with the local time as the game writes it, parses it, and
+    checks every event's daily and hourly bucket against the date and hour
+    on its line, so that the clock changes are covered, including those of
+    timezones offset by part of an hour. The local timezone is the
+    process's own.
+    Parameters:
+        location (str): where to write the log
+        year (int): the year to cover
+        step (int): the seconds between lines
+    Returns:
+        list: a description of each mismatch, empty if there were none
+    '''
+    start = int(time.mktime((year, 1, 1, 0, 0, 0, 0, 0, -1)))
+    end = int(time.mktime((year+1, 1, 1, 0, 0, 0, 0, 0, -1)))
+    stamps = range(start, end, step)
+    dates = []
+    hours = []
+    with open(location, 'w', encoding='utf-8') as f:
+        for n,stamp in enumerate(stamps, start=1):
+            d, t = time.strftime('%Y%m%d %H%M%S', time.localtime(stamp)).split()
+            f.write('[0,{}T{},0,Name@,@,,,System]You received {} Dilithium Ore.\n'.format(d, t, n))
+            dates.append(d)
+            hours.append(d + t[:2])
+    container = stolp.parse_log(location)
+    mismatches = []
+    if len(container) != len(stamps):
+        return ['parsed {} of {} events'.format(len(container), len(stamps))]
+    for loot,d in zip(container, dates):
+        if time.strftime('%Y%m%d', time.localtime(loot.timestamp)) != d:
+            mismatches.append('{} stamped {}'.format(loot, d))
+    for keys,form,group,totals in ((dates, '%Y%m%d', container.group_by_day, container.totals_by_day),
+                                   (hours, '%Y%m%d%H', container.group_by_hour, container.hourly_totals)):
+        expected = []
+        for n,key in enumerate(keys, start=1):
+            if expected and expected[-1][0] == key:
+                expected[-1][1] += 1
+                expected[-1][2] += n
+            else:
+                expected.append([key, 1, n])
+        buckets = [(start_date.strftime(form), len(events))
+                   for start_date,events in group()]
+        sums = [(start_date.strftime(form), gains.get('Dilithium Ore'))
+                for start_date,gains,losses in totals()]
+        for name,found,wanted in ((group.__name__, buckets, [tuple(row[:2]) for row in expected]),
+                                  (totals.__name__, sums, [tuple(row[::2]) for row in expected])):
+            for got,want in itertools.zip_longest(found, wanted):
+                if got != want:
+                    mismatches.append('{} gave {} for {}'.format(name, got, want))
+                    break
+    utc_days = len({stamp // 86400 for stamp in stamps})
+    if len(list(container.totals_by_day(UTC=True))) != utc_days:
+        mismatches.append('totals_by_day(UTC=True) did not give {} days'.format(utc_days))
+    return mismatches
+
+def check_dst(zones=('America/New_York', 'Europe/London', 'Australia/Lord_Howe',
+                     'America/St_Johns')):
+    '''
+    Prints whether daily and hourly buckets follow the local clock through the
+    clock changes of several timezones, using dst_mismatches. Each zone is
+    checked in a fresh process with TZ set, since the local timezone is
+    looked up once per process; TZ is only honored on Unix.
+    Parameter:
+        zones (tuple): the timezones to check
+    Returns:
+        bool: whether every zone passed
+    '''
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = ('import sys, benchmark; mismatches = benchmark.dst_mismatches(sys.argv[1]); '
+            'print(*mismatches[:5], sep=chr(10)); sys.exit(bool(mismatches))')
+    passed = True
+    print('DST check', 'Result', sep='\t')
+    with tempfile.TemporaryDirectory() as dirname:
+        for zone in zones:
+            location = os.path.join(dirname, 'Chat_dst.log')
+            result = subprocess.run([sys.executable, '-c', code, location], cwd=here,
+                                    env=dict(os.environ, TZ=zone), capture_output=True, text=True)
+            print(zone, 'failed' if result.returncode else 'ok', sep='\t')
+            if result.returncode:
+                passed = False
+                print(result.stdout or result.stderr, end='', file=sys.stderr)
+    return passed
+
+def legacy_container(zone, events=100):
+    '''
+    Builds a Container the way the original version held one, with a list
+    of Loot objects that each store a timezone-aware datetime, so that it
+    pickles the way that version's saves did.
+    Parameters:
+        zone (tzinfo): the timezone of the datetimes
+        events (int): the number of events
+    Returns:
+        Container: the old-style Container
+    '''
+    start = datetime.datetime(2015, 5, 6, 12)
+    bag = []
+    for n in range(events):
+        loot = object.__new__(stolp.Loot)
+        moment = start + datetime.timedelta(minutes=n)
+        loot.__dict__.update(datetime=zone.localize(moment) if hasattr(zone, 'localize')
+                             else moment.replace(tzinfo=zone),
+                             interaction='', winner='', gain_item='Dilithium Ore',
+                             gain_value=n+1, loss_item='', loss_value=0)
+        bag.append(loot)
+    container = object.__new__(stolp.Container)
+    container.__dict__['bag'] = bag
+    return container
+
+def check_legacy_pickles(events=100):
+    '''
+    Prints whether Container.load_pickle opens old saves stamped with each
+    kind of timezone that tzlocal has returned, and still refuses a file
+    that runs code. Kinds whose package is not installed are skipped.
+    Parameter:
+        events (int): the number of events in each save
+    Returns:
+        bool: whether every check passed
+    '''
+    zones = [('UTC', lambda: datetime.timezone.utc)]
+    try:
+        import zoneinfo
+    except ImportError:
+        zones.append(('zoneinfo', None))
+    else:
+        zones.append(('zoneinfo', lambda: zoneinfo.ZoneInfo('America/New_York')))
+    for name,module in (('pytz', 'pytz'), ('pytz_deprecation_shim', 'pytz_deprecation_shim')):
+        try:
+            package = __import__(module)
+        except ImportError:
+            zones.append((name, None))
+        else:
+            zones.append((name, functools.partial(package.timezone, 'America/New_York')))
+    passed = True
+    print('Legacy pickle', 'Result', sep='\t')
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'old.pickle')
+        for name,zone in zones:
+            if zone is None:
+                print(name, 'skipped', sep='\t')
+                continue
+            old = legacy_container(zone(), events)
+            with open(location, 'wb') as output:
+                pickle.dump(old, output)
+            try:
+                loaded = stolp.Container.load_pickle(location)
+                ok = ([loot.timestamp for loot in loaded] ==
+                      [int(loot.__dict__['datetime'].timestamp()) for loot in old.bag]
+                      and loaded.total_value() == events*(events+1)//2)
+            except pickle.UnpicklingError:
+                ok = False
+            print(name, 'ok' if ok else 'failed', sep='\t')
+            passed = passed and ok
+        with open(location, 'wb') as output:
+            pickle.dump(subprocess.Popen, output)
+        try:
+            stolp.Container.load_pickle(location)
+        except pickle.UnpicklingError:
+            print('refuses code', 'ok', sep='\t')
+        else:
+            print('refuses code', 'failed', sep='\t')
+            passed = False
+    return passed
+
+def timed(function, *args, **kwargs):
+    '''
+    Calls a function, timing it.
+    Parameters:
+        function (callable): the function to call
+        args: its positional arguments
+        kwargs: its keyword arguments
+    Returns:
+        tuple: the result and the seconds taken
+    '''
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def suite(lines, seed=0):
+    '''
+    Times every hot path on generated logs, returning the results in a form
+    that can be saved as JSON and compared between commits.
+    Parameters:
+        lines (int): the number of lines in each generated log
+        seed (int): the random seed for the generated logs
+    Returns:
+        dict: the size of the run and the seconds taken by each stage
+    '''
+    results = {'lines':lines, 'seed':seed, 'python':platform.python_version(),
+               'numpy':stolp.numpy_present, 'tzlocal':stolp.tzlocal_present, 'seconds':{}}
+    seconds = results['seconds']
+    with tempfile.TemporaryDirectory() as dirname:
+        location = os.path.join(dirname, 'Chat_2015-05-06.log')
+        generate_log(location, lines, seed=seed)
+        container, seconds['parse'] = timed(stolp.container_from_logs, location)
+        pasted = os.path.join(dirname, 'pasted.txt')
+        generate_log(pasted, lines, seed=seed, cp=True)
+        pasted, seconds['parse cp'] = timed(stolp.container_from_logs, pasted, cp=True)
+        results['events'] = len(container)
+        results['pasted events'] = len(pasted)
+        for name,filters in queries:
+            seconds['filter '+name] = timed(container.bag.select, **filters)[1]
+        seconds['totals_by_day'] = timed(list, container.totals_by_day())[1]
+        seconds['totals_by_day cached'] = timed(list, container.totals_by_day())[1]
+        seconds['totals_by_day gain_item'] = timed(list, container.totals_by_day(
+                                                   gain_item='Dilithium Ore'))[1]
+        seconds['dabo'] = timed(list, container.dabo())[1]
+        seconds['dabo sessions'] = timed(container.dabo_sessions)[1]
+        seconds['counter'] = timed(container.counter)[1]
+        report = os.path.join(dirname, 'totals.csv')
+        seconds['export totals'] = timed(lambda: stolp.export_report(
+                                         report, *container.report('totals')))[1]
+        saved = os.path.join(dirname, 'container.loot')
+        seconds['save'] = timed(container.save, saved)[1]
+        seconds['load'] = timed(stolp.Container.load, saved)[1]
+    return results
+
+if __name__ == '__main__':
+    if '*dst' in sys.argv:
+        sys.exit(not check_dst())
+    if '*legacy' in sys.argv:
+        sys.exit(not check_legacy_pickles())
+    lines = int(sys.argv[1]) if sys.argv[1:2] else 10000000
+    if '*json' in sys.argv:
+        print(json.dumps(suite(lines), indent=4))
+        sys.exit()
+    check_dst()
+    check_legacy_pickles()
+    bench_import()
+    bench_scan(lines)
+    bench_read(lines)
+    bench_read(lines//10, noise=0.1)
+    bench_parallel(lines//8)
+    bench_parallel(lines//8, cp=True)
+    bench_memory(lines//10)
+    bench_loot(lines//10)
+    bench_filter(lines)
+    bench_rollup(lines)
+    bench_store(lines//4)
+    bench_chain(lines//2)
+    bench_merge(lines//2)
+    bench_save_load(lines)
+    bench_export(lines)
+    bench_follow()
@@ -1,5 +1,104 @@
 import re
+import os
 import sys
+import time
+import concurrent.futures
 
-with open(sys.argv[1]) as f, open(sys.argv[2], 'w') as output:
-    output.write(re.sub(r'\[\d+,\d+T\d+,0,@,@,,,Combat.*\r?\n', '', f.read()))
+import sto_loot_parser as stolp
+
+combat_expression = re.compile(rb'\[\d+,\d+T\d+,0,@,@,,,Combat[^\n]*\n')
+
+def filter_chunk(chunk, system=False):
+    '''
+    Removes unwanted lines from a chunk of a saved chatlog.
+    Parameters:
+        chunk (bytes): complete lines of a log
+        system (bool): whether to keep only the System lines that
+            container_from_logs can parse, rather than only removing
+            the player's Combat lines
+    Returns:
+        bytes: the lines that were kept
+    '''
+    if system:
+        lines = [line for offset,line,result in stolp.matching_lines(chunk)]
+        return b'\n'.join(lines) + b'\n' if lines else b''
+    return combat_expression.sub(b'', chunk)
+
+def filter_log(filename, output, system=False):
+    '''
+    Streams a saved chatlog through filter_chunk a chunk at a time, so
+    memory use does not grow with the size of the log. The output is
+    written to a temporary file that replaces the output file only once
+    it is complete, so the output may be the log itself. A UTF-8 BOM at
+    the start of the log, which read_chunks drops, is written back.
+    Parameters:
+        filename (str): the log to read
+        output (str): where to write the filtered log
+        system (bool): whether to keep only the parseable System lines
+    Returns:
+        tuple: the number of bytes read and the number of bytes written
+    '''
+    size = os.path.getsize(filename)
+    written = 0
+    temp = output + '.tmp'
+    with open(filename, 'rb') as f:
+        bom = f.read(3) == b'\xef\xbb\xbf'
+    try:
+        with open(temp, 'wb') as f:
+            if bom:
+                written += f.write(b'\xef\xbb\xbf')
+            for chunk in stolp.read_chunks(filename):
+                written += f.write(filter_chunk(chunk, system))
+        os.replace(temp, output)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return size, written
+
+def filter_logs(location, output, system=False, workers=None):
+    '''
+    Filters a single chatlog, or every Chat_ log in a directory into
+    another directory under the same names.
+    Parameters:
+        location (str): a log, or a directory of logs
+        output (str): where to write the filtered log, or the directory
+            to write the filtered logs to
+        system (bool): whether to keep only the parseable System lines
+        workers (int): the number of processes that filter logs
+            in parallel, or None to filter them one at a time
+    Yields:
+        (str, int, int): the name of each log as it is finished, the number
+            of bytes read from it and the number of bytes written
+    '''
+    if os.path.isdir(location):
+        files = stolp.log_files(os.path.join(location, ''))
+        os.makedirs(output, exist_ok=True)
+        outputs = [os.path.join(output, os.path.basename(filename)) for filename in files]
+    else:
+        files = [location]
+        outputs = [output]
+    if workers:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = {executor.submit(filter_log, filename, out, system):filename
+                       for filename,out in zip(files, outputs)}
+            for future in concurrent.futures.as_completed(futures):
+                yield (os.path.basename(futures[future]), *future.result())
+    else:
+        for filename,out in zip(files, outputs):
+            yield (os.path.basename(filename), *filter_log(filename, out, system))
+
+if __name__ == '__main__':
+    
+    workers = os.cpu_count() if '*parallel' in sys.argv else None
+    start = time.perf_counter()
+    total_in = total_out = 0
+    print('Log', 'Bytes in', 'Bytes out', sep='\t')
+    for name,size,written in filter_logs(sys.argv[1], sys.argv[2],
+                                         system='*system' in sys.argv, workers=workers):
+        print(name, size, written, sep='\t')
+        total_in += size
+        total_out += written
+    seconds = time.perf_counter() - start
+    print('Total', total_in, total_out, sep='\t')
+    print('MB/s', round(total_in/1e6/max(seconds, 1e-9), 1), sep='\t')
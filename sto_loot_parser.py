@@ -4,60 +4,968 @@ import time
 import sys
 import collections
 import os
-import pickle
+import array
+import bisect
+import itertools
+import math
+import operator
+import functools
+import mmap
+import struct
+import contextlib
+import glob
+import heapq
+import importlib
+import importlib.util
 
-try:
-    import tzlocal
-except ImportError:
-    tzlocal_present = False
-else:
-    tzlocal_present = True
+# Modules that take a while to import are imported when they are first used,
+# so that the CLI and the GUI start quickly: the optional NumPy and tzlocal
+# through LazyModule, and pickle, csv, json and concurrent.futures inside the
+# functions that use them.
 
-now = datetime.datetime.now()
-min_date = datetime.datetime(2002, 1, 1)
-year = now.year
+class LazyModule:
+    '''
+    Stands in for an optional module until one of its attributes is used,
+    then imports the module and puts it in its place.
+    Attributes:
+        name (str): the name of the module
+    '''
+    def __init__(self, name):
+        self.name = name
+    
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.name)
+        globals()[self.name] = module
+        return getattr(module, attribute)
+
+tzlocal_present = importlib.util.find_spec('tzlocal') is not None
+tzlocal = LazyModule('tzlocal')
+
+numpy_present = importlib.util.find_spec('numpy') is not None
+numpy = LazyModule('numpy')
+
+def vectorize(column):
+    '''
+    Tells whether to work on a column with NumPy, which is only worth
+    importing once there are more than a thousand rows.
+    Parameter:
+        column (array or memoryview): the column
+    Returns:
+        bool: whether to use NumPy
+    '''
+    return numpy_present and len(column) > 1000
+
+@functools.lru_cache(maxsize=None)
+def local_zone():
+    '''
+    Returns the local timezone from tzlocal, looked up only once.
+    Returns:
+        tzinfo: the local timezone
+    '''
+    return tzlocal.get_localzone()
+
+def localize(moment):
+    '''
+    Attaches the local timezone to a naive datetime if tzlocal is available.
+    Parameter:
+        moment (datetime): a naive local date and time
+    Returns:
+        datetime: the same moment, timezone-aware if possible
+    '''
+    if not tzlocal_present:
+        return moment
+    zone = local_zone()
+    if hasattr(zone, 'localize'):
+        return zone.localize(moment)
+    return moment.replace(tzinfo=zone)
+
+def zone_name():
+    '''
+    Names the local timezone, so that anything bucketed by local day
+    can tell whether it was bucketed in another timezone.
+    Returns:
+        str: the timezone's name
+    '''
+    if tzlocal_present:
+        return str(local_zone())
+    return '{} {} {}'.format(time.timezone, *time.tzname)
+
+def current_date():
+    '''
+    Returns the local date and time, which is the default latest date of a
+    query. It is read for each query, so it does not go stale in a long session.
+    Returns:
+        datetime: the current moment
+    '''
+    return localize(datetime.datetime.now())
+
+@functools.lru_cache(maxsize=None)
+def earliest_date():
+    '''
+    Returns the default earliest date of a query, resolving the
+    timezone the first time it is needed.
+    Returns:
+        datetime: the start of 2002
+    '''
+    return localize(datetime.datetime(2002, 1, 1))
+
+def __getattr__(name):
+    # now, min_date and year are computed when they are read, not at import
+    if name == 'now':
+        return current_date()
+    if name == 'min_date':
+        return earliest_date()
+    if name == 'year':
+        return current_date().year
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+CHUNK_SIZE = 1 << 20
+PIECE_SIZE = 1 << 26
 
-if tzlocal_present:
-    now = tzlocal.get_localzone().localize(now)
-    min_date = tzlocal.get_localzone().localize(min_date)
+# Saved LootTable files start with the magic bytes, the format version, whether
+# the numbers are big-endian, the number of strings and the number of rows.
+file_magic = b'STOLOOT\x00'
+file_header = struct.Struct('<8sIIQQ')
+FILE_VERSION = 4
+# Version 2 files and later end with a Rollup, which starts with the length of the
+# timezone name, whether hours are kept, and for each bucketing (local days,
+# UTC days, local hours, UTC hours) whether it is in order, the number of
+# buckets and the number of totals.
+rollup_header = struct.Struct('<I?????3xQQQQQQQQ')
 
-def container_from_logs(location, cp=False):
+paste_prefix = (r'^(?:\[(\d+/\d+)? ?(\d+:\d+)?\] )?(?:\[[^]]+\] )?'
+      r'(?:\[(?:NumericReceived|ItemReceived|NumericLost|GameplayAnnounce|Default)\] )?'
+      )
+
+log_prefix = r'^\[\d+,(\d+)T(\d+),0,[^@]+@,@,,,System\]'
+
+interaction_expression = (r"(?:You (didn't win any|spent|discarded|lost|refined"
+      r"|received|sold|placed a bet of|won)|Items? acquired:|(.*) "
+      r'(?:has acquired an?|hat eine?n?))'
+      r' ([0-9,]+ )?(.*)'
+   )
+
+paste_expression = re.compile(paste_prefix+interaction_expression)
+log_expression = re.compile(log_prefix+interaction_expression)
+
+# The saved-logfile expression as bytes, for matching lines where they lie in
+# a memory-mapped log; [^@\n] keeps a match from running onto the next line.
+mapped_expression = re.compile(rb'\[\d+,(\d+)T(\d+),0,[^@\n]+@,@,,,System\]'
+                               + interaction_expression.encode())
+
+# Every line that interaction_expression can match contains one of these,
+# and every System line in a saved log contains system_tag.
+system_tag = b',System]'
+keywords = (b'You ', b'acquired', b' hat ein')
+
+# The month and day that start a dated line of a pasted log, after the line end
+# before it (so the search can skip ahead to each line end) or the file's start.
+paste_date = re.compile(rb'\n\[(\d+)/(\d+)')
+first_paste_date = re.compile(rb'(?:\xef\xbb\xbf)?\[(\d+)/(\d+)')
+
+def container_from_logs(location, cp=False, workers=None, cache=False, stats=None):
     '''
     Parses log files (starting) from the given location and creates
     a Container object to hold the created Loot objects.
     Parameters:
-        location (str): the location of a pasted log, or the
-            location of the first chatlog in a series
-        cp (bool): whether the parser should read a single log file
-            with the copy-paste syntax rather than the default behavior
-            of reading every available log file starting from the given
-            one and using the saved-logfile syntax
+        location (str or list): the location of the first chatlog in a series,
+            or for pasted logs, a location, a glob pattern or a list of either
+        cp (bool): whether the parser should read pasted logs with the
+            copy-paste syntax rather than the default behavior of reading
+            every available log file starting from the given one and
+            using the saved-logfile syntax
+        workers (int): the number of processes that parse log files
+            in parallel, or None to parse them one at a time
+        cache (bool): whether to keep a LogCache next to the logs so
+            that only new logs and the new end of a growing log are parsed
+        stats (Stats): records where the parsing time went, or None
     Returns:
         Container: populated with Loot objects
     '''
-    paste = (r'^(?:\[(\d+/\d+)? ?(\d+:\d+)?\] )?(?:\[[^]]+\] )?'
-          r'(?:\[(?:NumericReceived|ItemReceived|NumericLost|GameplayAnnounce|Default)\] )?'
-          )
+    container = Container()
+    for result,done,total in load_logs(location, cp=cp, workers=workers, cache=cache,
+                                       stats=stats):
+        print('Processing... {:.0%}'.format(done/total if total else 1), end='\r', file=sys.stderr)
+        if stats is None:
+            container.extend(result)
+        else:
+            with stats.stage('merge'):
+                container.extend(result)
+    print('\nDone.', file=sys.stderr)
+    return container
 
-    log = r'^\[\d+,(\d+)T(\d+),0,[^@]+@,@,,,System\]'
+def load_logs(location, cp=False, workers=None, cache=False, stats=None, stop=None):
+    '''
+    Parses log files the way container_from_logs does, but yields the events
+    from each piece of a log as soon as that piece is parsed, so that callers
+    can show progress, use the events before every log is done, or stop early.
+    Logs are parsed in pieces of about PIECE_SIZE bytes, split on line ends.
+    The yielded Containers may be kept by the LogCache, so callers should
+    extend their own Container with them rather than changing them.
+    Pasted logs are also split where a new year begins, and each event
+    from one is marked with the log's source, as paste_segments describes.
+    Parameters:
+        location (str or list): the location of the first chatlog in a series,
+            or for pasted logs, a location, a glob pattern or a list of either
+        cp (bool): whether to read pasted logs with the copy-paste syntax
+        workers (int): the number of processes that parse log files
+            in parallel, or None to parse them one at a time
+        cache (bool): whether to keep a LogCache next to the logs so
+            that only new logs and the new end of a growing log are parsed
+        stats (Stats): records where the parsing time went, or None
+        stop (Event): stops parsing after the current piece once it is set
+    Yields:
+        tuple (Container, int, int): the events from a piece, the number
+            of bytes parsed so far and the total number of bytes to parse
+    '''
+    if cp:
+        cache = False
+        jobs = [(filename, 0, None) for filename in paste_files(location)]
+    elif cache:
+        cache = LogCache(os.path.dirname(location))
+        jobs = [cache.job(filename) for filename in log_files(location)]
+    else:
+        jobs = [(filename, 0, None) for filename in log_files(location)]
+    pieces = split_jobs(jobs, cp)
+    sizes = [(os.path.getsize(filename) if end is None else end) - start
+             for filename,start,end,year in pieces]
+    done = 0
+    total = sum(sizes)
+    if cache:
+        # events parsed on an earlier run, from logs that have only grown since
+        for filename,start,end in jobs:
+            if start:
+                yield cache.entries[os.path.basename(filename)][4], done, total
+    for (piece, result),size in zip(parse_pieces(pieces, cp, workers, stats), sizes):
+        if cache:
+            cache.update(result, *piece[:3])
+        done += size
+        yield result, done, total
+        if stop is not None and stop.is_set():
+            break
+    if cache:
+        cache.save()
 
-    expression = (r"(?:You (didn't win any|spent|discarded|lost|refined"
-          r"|received|sold|placed a bet of|won)|Items? acquired:|(.*) "
-          r'(?:has acquired an?|hat eine?n?))'
-          r' ([0-9,]+ )?(.*)'
-       )
-   
-    container = Container()
+def split_jobs(jobs, cp=False):
+    '''
+    Splits byte ranges of logs into the pieces that parse_pieces parses.
+    A pasted log is always split whole, where each year begins.
+    Parameters:
+        jobs (list): a tuple (str, int, int) for each log, holding its
+            location and the byte range to parse
+        cp (bool): whether the logs use the copy-paste syntax
+    Returns:
+        list: a tuple (str, int, int, int) for each piece, holding the
+            log, the byte range and the year of a pasted log's events
+    '''
     if cp:
-        expression = paste+expression
+        return [(*piece, year) for filename,start,end in jobs
+                for first,last,year in paste_segments(filename)
+                for piece in split_job(filename, first, last)]
+    return [(*piece, None) for job in jobs for piece in split_job(*job)]
+
+def parse_pieces(pieces, cp=False, workers=None, stats=None):
+    '''
+    Parses pieces of logs, in order, one at a time or in a pool of processes.
+    Stopping early cancels any pieces that have not started.
+    Parameters:
+        pieces (list): the pieces from split_jobs
+        cp (bool): whether the logs use the copy-paste syntax
+        workers (int): the number of processes that parse pieces
+            in parallel, or None to parse them one at a time
+        stats (Stats): records where the parsing time went, or None
+    Yields:
+        tuple (tuple, Container): each piece and the events parsed from it
+    '''
+    parse = parse_log if stats is None else profile_log
+    if workers:
+        import concurrent.futures
+        executor = concurrent.futures.ProcessPoolExecutor(workers)
+        filenames, starts, ends, years = zip(*pieces) if pieces else ((),)*4
+        results = executor.map(parse, filenames, starts, ends, [cp]*len(pieces), years)
     else:
-        expression = log+expression
-    for line in get_logs(location, cp):
-        match = re.match(expression, line)
-        if match:
-            container.add(Loot(cp=cp, *match.groups()))
+        executor = None
+        results = (parse(filename, start, end, cp, year) for filename,start,end,year in pieces)
+    try:
+        for piece,result in zip(pieces, results):
+            if stats is not None:
+                result, job_stats = result
+                stats.update(job_stats)
+            yield piece, result
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+def split_job(filename, start, end, size=None):
+    '''
+    Splits a byte range of a log into pieces that end on line ends.
+    Parameters:
+        filename (str): the location of the log
+        start (int): the beginning of the range
+        end (int): the end of the range, or None for the end of the file
+        size (int): the approximate number of bytes per piece, or None
+            for PIECE_SIZE
+    Yields:
+        tuple (str, int, int): the log and the byte range of each piece;
+            the last piece keeps the original end
+    '''
+    size = size or PIECE_SIZE
+    limit = os.path.getsize(filename) if end is None else end
+    while limit - start > size:
+        middle = line_end(filename, start, start+size)
+        if middle == start:
+            break
+        yield filename, start, middle
+        start = middle
+    yield filename, start, end
+
+def paste_files(location):
+    '''
+    Returns the paths of pasted logs, such as one per character. A location
+    that is not a file and matches none raises FileNotFoundError.
+    Parameter:
+        location (str or list): a pasted log, a glob pattern matching
+            several, or a list of either
+    Returns:
+        list: the path of each pasted log
+    '''
+    files = []
+    for pattern in ([location] if isinstance(location, str) else location):
+        matches = [pattern] if os.path.exists(pattern) else sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError('No such file or matching files: {!r}'.format(pattern))
+        files.extend(matches)
+    return files
+
+def paste_segments(filename):
+    '''
+    Splits a pasted log where each new year begins. Pasted lines only give
+    the month and day, so the log is scanned for them first: each time the month
+    goes back, a new year has begun, and the last year is the one the log
+    was last modified in, or the year before if its last date would
+    otherwise come after that.
+    Parameter:
+        filename (str): the location of the pasted log
+    Returns:
+        list: a tuple (int, int, int) for each year in the log, holding its
+            first byte, the byte after its last (None for the last year),
+            and the year
+    '''
+    starts = [0]
+    last = None
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                opening = first_paste_date.match(mapped)
+                text = month = match = None
+                for match in itertools.chain([opening] if opening else (),
+                                             paste_date.finditer(mapped)):
+                    # most lines are in the same month as the line before
+                    if match[1] != text:
+                        text = match[1]
+                        if month is not None and int(text) < month:
+                            starts.append(match.start() + 1)
+                        month = int(text)
+                if match:
+                    last = (month, int(match[2]))
+        modified = datetime.date.fromtimestamp(os.fstat(f.fileno()).st_mtime)
+    first = modified.year - (last is not None and last > (modified.month, modified.day))
+    first -= len(starts) - 1
+    return [(start, end, first+idx)
+            for idx,(start, end) in enumerate(zip(starts, [*starts[1:], None]))]
+
+def paste_source(filename):
+    '''
+    Names the source of a pasted log after the file, such as the character
+    whose chat it holds.
+    Parameter:
+        filename (str): the location of the pasted log
+    Returns:
+        str: the file's name without its directory or extension
+    '''
+    return os.path.splitext(os.path.basename(filename))[0]
+
+def log_source(filename):
+    '''
+    Names the source of a saved log after the file, which together with each
+    event's byte offset in it identifies the event wherever the log is read
+    from, so that copies of a log are recognized when their events are merged.
+    Parameter:
+        filename (str): the location of the saved log
+    Returns:
+        str: the file's name without its directory
+    '''
+    return os.path.basename(filename)
+
+def parse_log(filename, start=0, end=None, cp=False, year=None, stats=None):
+    '''
+    Parses a single log file, read as large bytes chunks, into a Container.
+    Events from a pasted log are marked with its paste_source and with the
+    byte offset of their line.
+    Parameters:
+        filename (str): the location of the log
+        start (int): the byte offset to start parsing from
+        end (int): the byte offset to stop parsing at, leaving out
+            any incomplete line before it, or None to parse to the end
+        cp (bool): whether the log uses the copy-paste syntax rather
+            than the default saved-logfile syntax
+        year (int): the year of a pasted log's events, or None for
+            the current year
+        stats (Stats): records where the parsing time went, or None
+    Returns:
+        Container: populated with Loot objects
+    '''
+    if not cp:
+        return parse_mapped(filename, start, end, stats)
+    container = Container()
+    position = start
+    if not start:
+        # read_chunks drops a leading BOM
+        with open(filename, 'rb') as f:
+            position = 3 if f.read(3) == b'\xef\xbb\xbf' else 0
+    chunks = read_chunks(filename, start=start, end=end)
+    if stats is None:
+        for chunk in chunks:
+            scan_chunk(chunk, container, cp, year, position)
+            position += len(chunk)
+        container.bag.set_source(paste_source(filename))
+        return container
+    name = os.path.basename(filename)
+    while True:
+        with stats.stage('read'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        stats.files[name] += len(chunk)
+        stats.counts['lines read'] += chunk.count(b'\n') + (not chunk.endswith(b'\n'))
+        with stats.stage('match'):
+            results = [(position + offset, result.groups())
+                       for offset,line,result in matching_lines(chunk, cp)]
+        stats.counts['lines matched'] += len(results)
+        with stats.stage('build'):
+            for offset,groups in results:
+                loot = Loot(*groups, cp=cp, year=year)
+                loot.offset = offset
+                container.add(loot)
+        position += len(chunk)
+    container.bag.set_source(paste_source(filename))
+    stats.counts['events'] += len(container)
+    return container
+
+def parse_mapped(filename, start=0, end=None, stats=None):
+    '''
+    Parses a saved log by memory-mapping it and matching a bytes expression
+    where each System line lies in the map, so lines are never copied
+    out or decoded whole; only the captured text is decoded. Events are
+    marked with the log's log_source and with the byte offset of their line.
+    Parameters:
+        filename (str): the location of the log
+        start (int): the byte offset to start parsing from
+        end (int): the byte offset to stop parsing at, leaving out
+            any incomplete line before it, or None to parse to the end
+        stats (Stats): records where the parsing time went, or None
+    Returns:
+        Container: populated with Loot objects
+    '''
+    container = Container()
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= start:
+            return container
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mapped:
+        stop = len(mapped) if end is None else mapped.rfind(b'\n', start, end) + 1 or start
+        if not start and mapped[:3] == b'\xef\xbb\xbf':
+            start = 3
+        if stats is None:
+            for offset,groups in mapped_groups(mapped, start, stop):
+                loot = Loot(*groups)
+                loot.offset = offset
+                container.add(loot)
+            container.bag.set_source(log_source(filename))
+            return container
+        stats.files[os.path.basename(filename)] += stop - start
+        with stats.stage('read'):
+            # counted a chunk at a time, since only slices of the map can be counted
+            stats.counts['lines read'] += sum(mapped[idx:min(idx+CHUNK_SIZE, stop)].count(b'\n')
+                                              for idx in range(start, stop, CHUNK_SIZE))
+            stats.counts['lines read'] += stop > start and mapped[stop-1:stop] != b'\n'
+        with stats.stage('match'):
+            results = list(mapped_groups(mapped, start, stop))
+        stats.counts['lines matched'] += len(results)
+        with stats.stage('build'):
+            for offset,groups in results:
+                loot = Loot(*groups)
+                loot.offset = offset
+                container.add(loot)
+    container.bag.set_source(log_source(filename))
+    stats.counts['events'] += len(container)
     return container
-            
+
+def mapped_groups(mapped, start, end):
+    '''
+    Yields the decoded groups of each loot line in part of a memory-mapped
+    saved log, jumping from one System line to the next.
+    Parameters:
+        mapped (mmap): the mapped log
+        start (int): where to start, at the beginning of a line
+        end (int): where to stop
+    Yields:
+        tuple (int, list): the offset of the line in the log and the
+            groups that log_expression would give for it
+    '''
+    match = mapped_expression.match
+    find = mapped.find
+    rfind = mapped.rfind
+    idx = find(system_tag, start, end)
+    while idx != -1:
+        offset = rfind(b'\n', start, idx) + 1 or start
+        result = match(mapped, offset, end)
+        if result:
+            groups = [None if group is None else group.decode('utf-8')
+                      for group in result.groups()]
+            groups[-1] = groups[-1].rstrip('\r')
+            yield offset, groups
+        idx = find(b'\n', idx, end)
+        if idx == -1:
+            break
+        idx = find(system_tag, idx, end)
+
+def profile_log(filename, start=0, end=None, cp=False, year=None):
+    '''
+    Parses a single log file with its own Stats, for parsing in
+    another process.
+    Parameters:
+        filename (str): the location of the log
+        start (int): the byte offset to start parsing from
+        end (int): the byte offset to stop parsing at, or None
+        cp (bool): whether the log uses the copy-paste syntax
+        year (int): the year of a pasted log's events, or None
+    Returns:
+        tuple: the Container and the Stats
+    '''
+    stats = Stats()
+    return parse_log(filename, start, end, cp, year, stats), stats
+
+def scan_chunk(chunk, container, cp=False, year=None, start=0):
+    '''
+    Parses complete lines of a log into Loot objects.
+    Parameters:
+        chunk (bytes): complete lines of a log
+        container (Container): where to add the Loot objects
+        cp (bool): whether the log uses the copy-paste syntax rather
+            than the default saved-logfile syntax
+        year (int): the year of pasted events, or None for the current year
+        start (int): the offset of the chunk in the log, which is added
+            to the offset of each line in the chunk
+    '''
+    for offset,line,result in matching_lines(chunk, cp):
+        loot = Loot(*result.groups(), cp=cp, year=year)
+        loot.offset = start + offset
+        container.add(loot)
+
+def matching_lines(chunk, cp=False):
+    '''
+    Yields the lines of a chunk that the loot expression matches. Only the
+    lines that pass a cheap substring prefilter are decoded and matched.
+    Parameters:
+        chunk (bytes): complete lines of a log
+        cp (bool): whether the log uses the copy-paste syntax rather
+            than the default saved-logfile syntax
+    Yields:
+        (int, bytes, Match): the offset of each matching line in the chunk,
+            the line without its line terminator, and its match
+    '''
+    match = (paste_expression if cp else log_expression).match
+    you, acquired, hat = keywords
+    for offset,line in (split_lines(chunk) if cp else tagged_lines(chunk, system_tag)):
+        if you in line or acquired in line or hat in line:
+            result = match(line.decode('utf-8'))
+            if result:
+                yield offset, line, result
+
+def split_lines(chunk):
+    '''
+    Yields every line of a chunk, split as bytes.splitlines splits them.
+    Parameter:
+        chunk (bytes): complete lines of a log
+    Yields:
+        (int, bytes): the offset of each line in the chunk and the line,
+            without its line terminator
+    '''
+    offset = 0
+    for line in chunk.splitlines(True):
+        yield offset, line.rstrip(b'\r\n')
+        offset += len(line)
+
+def tagged_lines(chunk, tag):
+    '''
+    Yields the lines of a chunk that contain the given tag, jumping from
+    one occurrence to the next rather than visiting every line.
+    Parameters:
+        chunk (bytes): complete lines of a log
+        tag (bytes): the substring to look for
+    Yields:
+        (int, bytes): the offset of each line containing the tag and
+            the line, without its line terminator
+    '''
+    find = chunk.find
+    rfind = chunk.rfind
+    idx = find(tag)
+    while idx != -1:
+        end = find(b'\n', idx)
+        if end == -1:
+            end = len(chunk)
+        start = rfind(b'\n', 0, idx) + 1
+        yield start, chunk[start:end].rstrip(b'\r')
+        idx = find(tag, end)
+
+def log_files(location):
+    '''
+    Returns the paths of every chatlog from the given one onward.
+    Parameter:
+        location (str): the location of the first chatlog in a series
+    Returns:
+        list: the path of each Chat_ log, in chronological order
+    '''
+    dirname = os.path.dirname(location)
+    basename = os.path.basename(location)
+    return [os.path.join(dirname, filename) for filename in sorted(os.listdir(dirname)) if
+                                                        filename.startswith('Chat_') and
+                                                        filename >= basename]
+
+def read_chunks(filename, chunk_size=CHUNK_SIZE, start=0, end=None):
+    '''
+    Yields the contents of a file in large binary chunks that each
+    end on a line boundary. A leading UTF-8 BOM is dropped.
+    Parameters:
+        filename (str): the file to read
+        chunk_size (int): the approximate number of bytes per chunk
+        start (int): the byte offset to start reading from
+        end (int): the byte offset to stop reading at, leaving out any
+            incomplete line before it, or None to read the whole file
+    Yields:
+        (bytes): complete lines of the file
+    '''
+    size = float('inf') if end is None else end - start
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        rest = b''
+        if not start:
+            rest = f.read(min(3, size))
+            size -= len(rest)
+            if rest == b'\xef\xbb\xbf':
+                rest = b''
+        while size > 0:
+            chunk = f.read(min(chunk_size, size))
+            if not chunk:
+                break
+            size -= len(chunk)
+            idx = chunk.rfind(b'\n') + 1
+            if idx:
+                yield rest + chunk[:idx]
+                rest = chunk[idx:]
+            else:
+                rest += chunk
+        if end is not None:
+            rest = rest[:rest.rfind(b'\n')+1]
+        if rest:
+            yield rest
+
+def line_end(filename, start, end):
+    '''
+    Finds where the last complete line of a range of a file ends.
+    Parameters:
+        filename (str): the file to look in
+        start (int): the beginning of the range
+        end (int): the end of the range
+    Returns:
+        int: the offset just past the last newline in the range,
+            or start if the range has no newline
+    '''
+    with open(filename, 'rb') as f:
+        while end > start:
+            block = max(start, end-CHUNK_SIZE)
+            f.seek(block)
+            idx = f.read(end-block).rfind(b'\n')
+            if idx != -1:
+                return block + idx + 1
+            end = block
+    return start
+
+class Stats:
+    '''
+    An opt-in record of where the time goes when parsing logs and
+    querying a Container. Stages from several worker processes are added
+    together, so they can total more than the time that actually passed.
+    Attributes:
+        seconds (Counter): each stage mapped to the wall time spent in it
+        counts (Counter): lines read, lines matched, events created
+            and rows selected
+        files (Counter): each log's file name mapped to the bytes read from it
+    '''
+    def __init__(self):
+        self.seconds = collections.Counter()
+        self.counts = collections.Counter()
+        self.files = collections.Counter()
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        '''
+        Adds the time spent in a with block to a stage.
+        Example:
+            with stats.stage('totals'):
+                totals = container.daily_totals()
+        Parameter:
+            name (str): the name of the stage
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+    
+    def update(self, other):
+        '''
+        Adds another Stats object's records to this one's.
+        Parameter:
+            other (Stats): the Stats to add
+        '''
+        self.seconds.update(other.seconds)
+        self.counts.update(other.counts)
+        self.files.update(other.files)
+    
+    def clear(self):
+        '''
+        Forgets everything recorded so far.
+        '''
+        self.seconds.clear()
+        self.counts.clear()
+        self.files.clear()
+    
+    def report(self, file=sys.stderr):
+        '''
+        Prints a short breakdown of the stages, counts and bytes read.
+        Parameter:
+            file (file): where to print the breakdown
+        '''
+        print('Stage', 'Seconds', sep='\t', file=file)
+        for name,seconds in self.seconds.items():
+            print(name, round(seconds, 3), sep='\t', file=file)
+        for name,count in self.counts.items():
+            print(name, count, sep='\t', file=file)
+        for name,size in self.files.items():
+            print(name, '{} bytes'.format(size), sep='\t', file=file)
+
+class LogCache:
+    '''
+    A persistent record of parsed chatlogs, stored next to the logs,
+    so that unchanged logs are not parsed again and a growing log is
+    only parsed from where the last parse stopped.
+    Attributes:
+        location (str): the location of the cache file
+        entries (dict): each log's file name mapped to a tuple of its size,
+            mtime, parsed byte offset, the bytes just before that offset,
+            and the Container parsed from it so far
+        owned (set): the file names of the cached Containers that have not
+            been handed to a caller as they are, which pieces can be added to
+    '''
+    name = '.sto_loot_cache'
+    
+    def __init__(self, dirname):
+        import pickle
+        self.location = os.path.join(dirname, self.name)
+        self.owned = set()
+        try:
+            # read through restricted_load, since anyone may have put a file
+            # with this name beside the logs
+            with open(self.location, 'rb') as f:
+                self.entries = restricted_load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.entries = {}
+        if not isinstance(self.entries, dict):
+            self.entries = {}
+        # logs cached before events were marked with their log_source and offset
+        self.entries = {k:v for k,v in self.entries.items()
+                        if not v[4] or v[4].bag.strings[v[4].bag.source[0]] == k}
+    
+    def job(self, filename):
+        '''
+        Works out which part of a log still needs parsing.
+        Parameter:
+            filename (str): the location of the log
+        Returns:
+            tuple (str, int, int): the log and the byte range to parse
+        '''
+        stat = os.stat(filename)
+        entry = self.entries.get(os.path.basename(filename))
+        if entry:
+            size, mtime, offset, tail, container = entry
+            if (size, mtime) == (stat.st_size, stat.st_mtime) or (
+                offset <= stat.st_size and self.tail(filename, offset) == tail):
+                return filename, offset, stat.st_size
+        return filename, 0, stat.st_size
+    
+    def update(self, container, filename, start, end):
+        '''
+        Records a freshly parsed range of a log.
+        Parameters:
+            container (Container): the Loot parsed from the range
+            filename (str): the location of the log
+            start (int): the beginning of the parsed range
+            end (int): the end of the parsed range
+        Returns:
+            Container: everything parsed from the log so far
+        '''
+        name = os.path.basename(filename)
+        cached = Container()
+        if start:
+            if name in self.owned:
+                cached = self.entries[name][4]
+            else:
+                # events cached on an earlier run have been handed to the caller
+                cached.extend(self.entries[name][4])
+        # pieces are added to a Container of the cache's own, rather than
+        # copying everything parsed so far for each piece of a log
+        cached.extend(container)
+        self.owned.add(name)
+        container = cached
+        offset = line_end(filename, start, end)
+        stat = os.stat(filename)
+        self.entries[name] = (end, stat.st_mtime if stat.st_size == end else None,
+                              offset, self.tail(filename, offset), container)
+        return container
+    
+    @staticmethod
+    def tail(filename, offset, length=64):
+        '''
+        Reads the bytes just before an offset, to check that a log
+        has only been appended to since it was last parsed.
+        Parameters:
+            filename (str): the location of the log
+            offset (int): the offset to read up to
+            length (int): how many bytes to read
+        Returns:
+            bytes: up to length bytes ending at offset
+        '''
+        with open(filename, 'rb') as f:
+            f.seek(max(0, offset-length))
+            return f.read(min(offset, length))
+    
+    def save(self):
+        '''
+        Writes the cache to disk, replacing the old one in a single step
+        and forgetting any logs that no longer exist.
+        '''
+        dirname = os.path.dirname(self.location)
+        self.entries = {k:v for k,v in self.entries.items()
+                        if os.path.exists(os.path.join(dirname, k))}
+        import pickle
+        temp = self.location + '.tmp'
+        with open(temp, 'wb') as output:
+            pickle.dump(self.entries, output)
+        os.replace(temp, self.location)
+
+class LogFollower:
+    '''
+    Follows the newest chatlog while the game writes it, parsing
+    appended lines as they arrive and moving on to a new Chat_ log
+    when the game starts one. New events are added to a live
+    Container and to its running DailyTotals.
+    Attributes:
+        location (str): the location of the log being followed
+        offset (int): how far into that log has been parsed
+        container (Container): every event parsed so far
+        totals (DailyTotals): the daily totals of those events
+    '''
+    def __init__(self, location, container=None, totals=None, from_end=True):
+        '''
+        Parameters:
+            location (str): the location of a chatlog; the newest log
+                from there onward is followed
+            container (Container): the Container to add events to,
+                or None for a new one
+            totals (DailyTotals): the totals to update, or None for new ones
+            from_end (bool): whether to skip what the newest log already
+                holds rather than parsing it first
+        '''
+        self.location = log_files(location)[-1]
+        self.container = Container() if container is None else container
+        self.totals = DailyTotals() if totals is None else totals
+        self.file = open(self.location, 'rb')
+        self.offset = 0
+        if from_end:
+            self.offset = line_end(self.location, 0, os.fstat(self.file.fileno()).st_size)
+        self.rest = b''
+    
+    def read(self, final=False):
+        '''
+        Parses whatever has been appended to the followed log.
+        Parameter:
+            final (bool): whether the log is finished, so that a last
+                line without a newline is parsed too
+        Returns:
+            Container: the new events
+        '''
+        batch = Container()
+        self.file.seek(self.offset + len(self.rest))
+        data = self.rest + self.file.read()
+        if not self.offset and data.startswith(b'\xef\xbb\xbf'):
+            data = data[3:]
+            self.offset = 3
+        end = len(data) if final else data.rfind(b'\n') + 1
+        if end:
+            scan_chunk(data[:end], batch, start=self.offset)
+            batch.bag.set_source(log_source(self.location))
+        self.offset += end
+        self.rest = data[end:]
+        return batch
+    
+    def poll(self):
+        '''
+        Checks once for new events, including those in a newer log
+        if the game has rolled over to one.
+        Returns:
+            Container: the new events, which have already been added
+                to the live Container and totals
+        '''
+        batch = self.read()
+        if not batch:
+            newest = log_files(self.location)[-1]
+            if newest != self.location:
+                batch.extend(self.read(final=True))
+                self.file.close()
+                self.location = newest
+                self.file = open(newest, 'rb')
+                self.offset = 0
+                self.rest = b''
+                batch.extend(self.read())
+        if batch:
+            self.container.extend(batch)
+            self.totals.add_rows(batch.bag, range(len(batch)))
+        return batch
+    
+    def run(self, interval=0.5, stop=None):
+        '''
+        Polls the logs until stopped, sleeping between polls.
+        Parameters:
+            interval (float): the seconds to wait between polls
+            stop (threading.Event): an event that ends the loop when set,
+                or None to follow until interrupted
+        Yields:
+            Container: each non-empty batch of new events
+        '''
+        try:
+            while not (stop and stop.is_set()):
+                batch = self.poll()
+                if batch:
+                    yield batch
+                elif stop:
+                    stop.wait(interval)
+                else:
+                    time.sleep(interval)
+        finally:
+            self.file.close()
+
 def get_logs(location, cp=False):
     '''
     Yields lines of each log being parsed.
@@ -75,126 +983,1906 @@ def get_logs(location, cp=False):
         with open(location, encoding='utf-8-sig') as f:
             yield from f
     else:
-        dirname = os.path.dirname(location)
-        basename = os.path.basename(location)
-        files = [filename for filename in sorted(os.listdir(dirname)) if
-                                                            filename.startswith('Chat_') and
-                                                            filename >= basename]
+        files = log_files(location)
         length = len(files)
         for idx,filename in enumerate(files, start=1):
             print('Processing {} out of {}...'.format(idx, length), end='\r', file=sys.stderr)
-            with open(os.path.join(dirname, filename), encoding='utf-8-sig') as f:
+            with open(filename, encoding='utf-8-sig') as f:
                 yield from f
         print('\nDone.', file=sys.stderr)
     
-class Container:
+def write_report(output, headers, rows, form='tsv'):
     '''
-    A container that holds Loot objects and has analysis methods.
-    Attributes:
-        bag (list): stores all the Loot objects
+    Writes a report to an open text file, one row at a time as the rows
+    are computed.
+    Parameters:
+        output (file): where to write the report
+        headers (list): the name of each column
+        rows (iter): the rows of the report
+        form (str): 'csv', 'tsv' or 'json'; TSV reports are each value's
+            str() joined by tabs, as the reports were always printed, and
+            JSON reports are an array with an object for each row
+    Returns:
+        int: the number of rows written
     '''
-    def __init__(self):
-        self.bag = []
-    
-    def add(self, loot):
-        '''
-        Adds a Loot object to the Container's bag.
-        Parameter:
-            loot (Loot): the Loot object to add to the bag
-        '''
-        self.bag.append(loot)
-    
-    def __add__(self, other):
-        '''
-        Adds two Container objects together.
-        Parameter:
-            other (Container): the Container to add to this one
-        Returns:
-            Container: a Container with this one's bag and the other's bag
-        '''
-        temp = Container()
-        temp.bag = self.bag + other.bag
-        return temp
-    
-    def extend(self, other):
-        '''
-        Adds another Container's bag onto this one's.
-        Parameter:
-            other (Container): the Container to add to this one
-        '''
-        self.bag.extend(other.bag)
-    
-    def __bool__(self):
-        '''
-        Indicates whether there is anything in the Container's bag.
+    count = 0
+    if form == 'tsv':
+        output.write('\t'.join(headers) + '\n')
+        for row in rows:
+            output.write('\t'.join(map(str, row)) + '\n')
+            count += 1
+        return count
+    if form == 'json':
+        import json
+        output.write('[')
+        for row in rows:
+            output.write(',\n' if count else '\n')
+            output.write(json.dumps(dict(zip(headers, row)), ensure_ascii=False, default=str))
+            count += 1
+        output.write('\n]\n')
+        return count
+    import csv
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def export_report(location, headers, rows, form=None):
+    '''
+    Writes a report to a UTF-8 file through a large buffer, replacing
+    any old file in a single step once the report is complete.
+    Parameters:
+        location (str): where to write the report
+        headers (list): the name of each column
+        rows (iter): the rows of the report
+        form (str): 'csv', 'tsv' or 'json', or None to go by the file
+            extension; anything but .json and .tsv/.txt is written as CSV
+    Returns:
+        int: the number of rows written
+    '''
+    if form is None:
+        extension = os.path.splitext(location)[1].lower()
+        form = {'.json':'json', '.tsv':'tsv', '.txt':'tsv'}.get(extension, 'csv')
+    temp = location + '.tmp'
+    try:
+        with open(temp, 'w', encoding='utf-8', newline='', buffering=1<<20) as output:
+            count = write_report(output, headers, rows, form)
+        os.replace(temp, location)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return count
+
+def local_datetime(timestamp):
+    '''
+    Builds the local datetime for an epoch second, timezone-aware
+    if tzlocal is available.
+    Parameter:
+        timestamp (int): seconds since the epoch
+    Returns:
+        datetime: the local date and time
+    '''
+    if tzlocal_present:
+        return datetime.datetime.fromtimestamp(timestamp, local_zone())
+    return datetime.datetime.fromtimestamp(timestamp)
+
+@functools.lru_cache(maxsize=None)
+def hour_start(year, month, day, hour):
+    '''
+    Returns the epoch second at which a local hour starts, cached so that
+    events only need their minutes and seconds added to it. It is found
+    from the hour's last second, since in timezones whose clocks move by
+    half an hour an hour may begin part way, after its start was skipped.
+    Parameters:
+        year (int): the year
+        month (int): the month
+        day (int): the day of the month
+        hour (int): the hour
+    Returns:
+        int: seconds since the epoch
+    '''
+    return int(localize(datetime.datetime(year, month, day, hour, 59, 59)).timestamp()) - 3599
+
+@functools.lru_cache(maxsize=None)
+def log_hour(d, hour):
+    '''
+    Returns the epoch second at which a local hour starts, given the
+    date and hour text of a saved chatlog line.
+    Parameters:
+        d (str): the date, as YYYYMMDD
+        hour (str): the hour, as HH
+    Returns:
+        int: seconds since the epoch
+    '''
+    return hour_start(int(d[:4]), int(d[4:6]), int(d[6:]), int(hour))
+
+def utc_offset(timestamp):
+    '''
+    Returns the local UTC offset at an epoch second.
+    Parameter:
+        timestamp (int): seconds since the epoch
+    Returns:
+        int: the offset in seconds
+    '''
+    moment = local_datetime(timestamp)
+    if moment.utcoffset() is None:
+        moment = moment.astimezone()
+    return int(moment.utcoffset().total_seconds())
+
+@functools.lru_cache(maxsize=None)
+def hour_offset(hour):
+    '''
+    Returns the local UTC offset during a UTC hour, cached since most hours
+    have a single offset. Timezones offset by part of an hour change their
+    clocks part way through a UTC hour, so those hours have none.
+    Parameter:
+        hour (int): hours since the epoch
+    Returns:
+        int: the offset in seconds, or None if it changes during the hour
+    '''
+    offset = utc_offset(hour*3600)
+    if utc_offset(hour*3600 + 3599) != offset:
+        return None
+    return offset
+
+def local_offset(timestamp):
+    '''
+    Returns the local UTC offset at an epoch second, using the cached
+    offset of its hour unless the clocks change during that hour.
+    Parameter:
+        timestamp (int): seconds since the epoch
+    Returns:
+        int: the offset in seconds
+    '''
+    offset = hour_offset(timestamp // 3600)
+    if offset is None:
+        return utc_offset(timestamp)
+    return offset
+
+def day_number(timestamp, UTC=False):
+    '''
+    Returns the calendar day an epoch second falls on.
+    Parameters:
+        timestamp (int): seconds since the epoch
+        UTC (bool): whether to use the UTC calendar day rather than the local one
+    Returns:
+        int: days since the epoch
+    '''
+    if UTC:
+        return timestamp // 86400
+    return (timestamp + local_offset(timestamp)) // 86400
+
+def hour_number(timestamp, UTC=False):
+    '''
+    Returns the clock hour an epoch second falls in.
+    Parameters:
+        timestamp (int): seconds since the epoch
+        UTC (bool): whether to use the UTC hour rather than the local one,
+            which differ in timezones offset by part of an hour
+    Returns:
+        int: hours since the epoch
+    '''
+    if UTC:
+        return timestamp // 3600
+    return (timestamp + local_offset(timestamp)) // 3600
+
+def day_start(timestamp, UTC=False):
+    '''
+    Returns the datetime that labels a daily bucket starting with an event,
+    which is the event's local datetime shifted to UTC if requested.
+    Parameters:
+        timestamp (int): seconds since the epoch
+        UTC (bool): whether the bucket is a UTC calendar day
+    Returns:
+        datetime: the bucket's label
+    '''
+    start_date = local_datetime(timestamp)
+    if UTC:
+        if start_date.utcoffset() is None:
+            return start_date - start_date.astimezone().utcoffset()
+        start_date -= start_date.utcoffset()
+    return start_date
+
+def as_numpy(values):
+    '''
+    Returns a NumPy view of a column without copying it.
+    Parameter:
+        values (array or memoryview): the column
+    Returns:
+        ndarray: the view
+    '''
+    return numpy.frombuffer(values, memoryview(values).format)
+
+def memoized(method):
+    '''
+    Decorates a Container query so that its results are kept in the
+    Container's query cache. Filters are normalized for the key, so sets
+    given in another order, or leaving out regex=False, share a result.
+    A result is only reused while the bag holds the same events, and the
+    least recently used result is dropped once there are cache_size.
+    Parameter:
+        method (function): the Container method to decorate
+    Returns:
+        function: the decorated method
+    '''
+    name = method.__name__
+    @functools.wraps(method)
+    def query(self, *args, **filters):
+        try:
+            key = (name, args, frozenset((k, frozenset(v) if isinstance(v, (set, frozenset, list, tuple))
+                                          else v) for k,v in filters.items()
+                                         if k != 'regex' or v))
+            hash(key)
+        except TypeError:
+            return method(self, *args, **filters)
+        cache = self.cache
+        bag = self.bag
+        size = len(bag)
+        entry = cache.get(key)
+        if entry is not None and entry[0] is bag and entry[1] == size:
+            cache.move_to_end(key)
+            if self.stats is not None:
+                self.stats.counts['cache hits'] += 1
+            return entry[2]
+        result = method(self, *args, **filters)
+        cache[key] = (bag, size, result)
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return result
+    return query
+
+def restricted_load(file):
+    '''
+    Unpickles a file that this program may not have written, such as an old
+    saved Container. Unpickling can run any code a file names, so only the
+    classes that saved Containers hold are allowed, and anything else
+    raises pickle.UnpicklingError.
+    Parameter:
+        file (file): the open binary file
+    Returns:
+        object: the unpickled object
+    '''
+    import pickle
+    allowed = {'sto_loot_parser': {'Container', 'LootTable', 'Loot'},
+               'array': {'array', '_array_reconstructor'},
+               'datetime': {'datetime', 'date', 'time', 'timedelta', 'timezone'},
+               # timezones saved with tzlocal: pytz before version 3, then
+               # zoneinfo, wrapped in pytz_deprecation_shim by versions 3 and 4
+               'zoneinfo': {'ZoneInfo'}, 'pytz': {'_p', '_UTC'},
+               'pytz_deprecation_shim._impl': {'wrap_zone'}}
+    def zone_getattr(owner, name):
+        # a ZoneInfo is pickled as a call to getattr(ZoneInfo, '_unpickle')
+        import zoneinfo
+        if owner is not zoneinfo.ZoneInfo or name != '_unpickle':
+            raise pickle.UnpicklingError('getattr({!r}, {!r}) is not allowed in a saved '
+                                         'Container'.format(owner, name))
+        return zoneinfo.ZoneInfo._unpickle
+    class Unpickler(pickle.Unpickler):
+        def find_class(self, module, name):
+            if (module, name) == ('builtins', 'getattr'):
+                return zone_getattr
+            if name not in allowed.get(module, ()):
+                raise pickle.UnpicklingError('{}.{} is not allowed in a saved Container'
+                                             .format(module, name))
+            if module == 'sto_loot_parser':
+                return globals()[name]
+            return super().find_class(module, name)
+    return Unpickler(file).load()
+
+def extra_filters(filters):
+    '''
+    Takes the filters that are not tests on a single attribute, such as
+    the date and value bounds, out of a set of filters.
+    Parameter:
+        filters (dict): the desired filters, which are left holding
+            only the filters on single attributes
+    Returns:
+        dict: each of those filters mapped to its value, or to its default
+    '''
+    return {k:filters.pop(k) if k in filters else v
+            for k,v in (('item', ''),
+                        ('regex', False),
+                        ('min_date', None), ('max_date', None),
+                        ('min_gain', 0), ('max_gain', 10000000000),
+                        ('min_loss', 0), ('max_loss', -10000000000))}
+
+class LootTable:
+    '''
+    Columnar storage for Loot events. Times are kept as epoch seconds
+    and strings are interned in one shared table and kept as integer
+    codes, so an event costs a few dozen bytes instead of a Loot object.
+    Indexing and iterating produce Loot objects on demand.
+    Rows are kept in chronological order, which is checked as events
+    are added and restored with a stable sort before the table is read,
+    so date ranges can be found by bisecting the timestamps.
+    Attributes:
+        strings (list): each distinct string, indexed by its code
+        codes (dict): each distinct string mapped to its code
+        timestamp (array): the epoch second of each event
+        interaction (array): the code of each event's interaction
+        winner (array): the code of each event's lockbox winner
+        gain_item (array): the code of each event's gained item
+        gain_value (array): each event's gained quantity
+        loss_item (array): the code of each event's lost item
+        loss_value (array): each event's lost quantity
+        source (array): the code of each event's source, the log it was
+            parsed from, or '' if not known
+        offset (array): the byte offset of each event's line in its log,
+            or 0 if not known
+        ordered (bool): whether the timestamps are currently in ascending order
+        index (dict): for each string column, an inverted index mapping each
+            code to the rows that hold it, or None until it is first needed
+        rollup (Rollup): the events' totals for each day, or None until
+            they are first needed
+    '''
+    columns = ('timestamp', 'interaction', 'winner', 'gain_item', 'gain_value',
+               'loss_item', 'loss_value', 'source', 'offset')
+    string_columns = ('interaction', 'winner', 'gain_item', 'loss_item', 'source')
+    
+    def __init__(self):
+        self.strings = ['']
+        self.codes = {'': 0}
+        for column in self.columns:
+            setattr(self, column, array.array('i' if column in self.string_columns else 'q'))
+        self.ordered = True
+        self.index = None
+        self.rollup = None
+        self.mapped = None
+    
+    def intern(self, string):
+        '''
+        Returns the code for a string, adding it to the table if necessary.
+        Parameter:
+            string (str): the string to look up
+        Returns:
+            int: the string's code
+        '''
+        code = self.codes.get(string)
+        if code is None:
+            code = self.codes[string] = len(self.strings)
+            self.strings.append(string)
+        return code
+    
+    def thaw(self):
+        '''
+        Copies any read-only columns, such as those mapped from a saved
+        file by load, into arrays so that rows can be added, and then
+        closes the mapped file.
+        '''
+        for column in self.columns:
+            values = getattr(self, column)
+            if not isinstance(values, array.array):
+                setattr(self, column, array.array(values.format, values.tobytes()))
+        values = None
+        if self.mapped is not None:
+            try:
+                self.mapped.close()
+            except BufferError:
+                # a view of a column is still in use; the map closes once it is dropped
+                pass
+            self.mapped = None
+    
+    def append(self, loot):
+        '''
+        Adds a Loot object's fields to the end of the table.
+        Parameter:
+            loot (Loot): the Loot object to add
+        '''
+        if not isinstance(self.timestamp, array.array):
+            self.thaw()
+        intern = self.intern
+        timestamp = loot.timestamp
+        if self.timestamp and timestamp < self.timestamp[-1]:
+            self.ordered = False
+        self.timestamp.append(timestamp)
+        self.interaction.append(intern(loot.interaction))
+        self.winner.append(intern(loot.winner))
+        self.gain_item.append(intern(loot.gain_item))
+        self.gain_value.append(loot.gain_value)
+        self.loss_item.append(intern(loot.loss_item))
+        self.loss_value.append(loot.loss_value)
+        self.source.append(intern(loot.source))
+        self.offset.append(loot.offset)
+        if self.index is not None:
+            row = len(self.timestamp) - 1
+            for column in self.string_columns:
+                code = getattr(self, column)[row]
+                positions = self.index[column].get(code)
+                if positions is None:
+                    positions = self.index[column][code] = array.array('i')
+                positions.append(row)
+        if self.rollup is not None:
+            if self.ordered:
+                self.rollup.add_rows(self, len(self.timestamp) - 1)
+            else:
+                self.rollup = None
+    
+    def extend(self, other):
+        '''
+        Adds the events of another LootTable, or of any iterable
+        of Loot objects, to the table, keeping it in chronological order.
+        Parameter:
+            other (LootTable or iterable): the events to add
+        '''
+        if not isinstance(self.timestamp, array.array):
+            self.thaw()
+        start = len(self)
+        if not isinstance(other, LootTable):
+            for loot in other:
+                self.append(loot)
+        elif other:
+            if self and (not other.ordered or other.timestamp[0] < self.timestamp[-1]):
+                self.ordered = False
+            if other is self:
+                other = self + LootTable()
+            mapping = [self.intern(string) for string in other.strings]
+            for column in self.columns:
+                if column in self.string_columns:
+                    getattr(self, column).extend(map(mapping.__getitem__, getattr(other, column)))
+                else:
+                    getattr(self, column).extend(getattr(other, column))
+            if self.index is not None and self.ordered:
+                self.build_index(start)
+            if self.rollup is not None and self.ordered:
+                self.rollup.add_rows(self, start)
+        if not self.ordered:
+            self.sort()
+    
+    def sort(self):
+        '''
+        Puts the rows in chronological order. The sort is stable, so events
+        with the same timestamp keep the order they were added in.
+        '''
+        if vectorize(self.timestamp):
+            order = numpy.argsort(as_numpy(self.timestamp), kind='stable')
+            for column in self.columns:
+                values = getattr(self, column)
+                setattr(self, column, array.array(memoryview(values).format,
+                                                  as_numpy(values)[order].tobytes()))
+        else:
+            order = sorted(range(len(self)), key=self.timestamp.__getitem__)
+            for column in self.columns:
+                values = getattr(self, column)
+                setattr(self, column, array.array(memoryview(values).format,
+                                                  map(values.__getitem__, order)))
+        self.ordered = True
+        self.index = None
+        self.rollup = None
+    
+    def __add__(self, other):
+        temp = LootTable()
+        temp.extend(self)
+        temp.extend(other)
+        return temp
+    
+    @classmethod
+    def merged(cls, tables):
+        '''
+        Merges tables into one in a single pass, as a k-way merge on their
+        timestamps, dropping the events that more than one of them holds, such
+        as when overlapping logs were parsed twice or archives from several
+        machines are combined. A run of seconds that only one table has events
+        in is copied whole; within a second that several tables share, events
+        are fingerprinted by every column, source and offset included. Parsed
+        events always have a source, the log they were parsed from, and the
+        offset of their line in it, so copies of a log are recognized however
+        they were reached, while identical events from different logs, or
+        from different lines of one log, are never taken for copies of each
+        other. An event without an offset that a table holds several times in
+        that second, like two identical drops added by hand, is kept as many
+        times as the table that holds it most often.
+        Parameter:
+            tables (list): the LootTables to merge
+        Returns:
+            LootTable: the merged events, in chronological order
+        '''
+        temp = cls()
+        tables = [table for table in tables if len(table)]
+        for table in tables:
+            if not table.ordered:
+                table.sort()
+        mappings = [[temp.intern(string) for string in table.strings] for table in tables]
+        if numpy_present and sum(map(len, tables)) > 1000:
+            temp.merge_arrays(tables, mappings)
+            return temp
+        positions = [0]*len(tables)
+        heap = [(table.timestamp[0], idx) for idx,table in enumerate(tables)]
+        heapq.heapify(heap)
+        while heap:
+            second, idx = heapq.heappop(heap)
+            group = [idx]
+            while heap and heap[0][0] == second:
+                group.append(heapq.heappop(heap)[1])
+            if len(group) == 1:
+                table = tables[idx]
+                end = (bisect.bisect_left(table.timestamp, heap[0][0], positions[idx])
+                       if heap else len(table))
+                temp.copy_rows(table, mappings[idx], range(positions[idx], end))
+                positions[idx] = end
+            else:
+                counts = {}
+                for idx in group:
+                    table = tables[idx]
+                    mapping = mappings[idx]
+                    start = positions[idx]
+                    end = positions[idx] = bisect.bisect_right(table.timestamp, second, start)
+                    columns = [getattr(table, column)[start:end] for column in cls.columns[1:]]
+                    seen = {}
+                    kept = []
+                    for row,(interaction, winner, gain_item, gain_value, loss_item, loss_value,
+                             source, offset) in enumerate(zip(*columns), start=start):
+                        key = (mapping[interaction], mapping[winner], mapping[gain_item],
+                               gain_value, mapping[loss_item], loss_value, mapping[source], offset)
+                        count = seen[key] = seen.get(key, 0) + 1
+                        if count > counts.get(key, 0):
+                            counts[key] = count
+                            kept.append(row)
+                    temp.copy_rows(table, mapping, kept)
+            for idx in group:
+                if positions[idx] < len(tables[idx]):
+                    heapq.heappush(heap, (tables[idx].timestamp[positions[idx]], idx))
+        return temp
+    
+    def merge_arrays(self, tables, mappings):
+        '''
+        Does the work of merged with NumPy. The rows of every table are put
+        in time order together, and only the rows in seconds that several
+        tables share are fingerprinted: those are sorted so that the copies
+        of an event are next to each other, in table order, and each table's
+        copies are kept only beyond the most that an earlier table holds.
+        Parameters:
+            tables (list): the LootTables to merge, each in chronological order
+            mappings (list): this table's code for each string of each table
+        '''
+        columns = {}
+        for column in self.columns:
+            parts = []
+            for table,mapping in zip(tables, mappings):
+                values = as_numpy(getattr(table, column))
+                if column in self.string_columns:
+                    values = numpy.array(mapping, numpy.int32)[values]
+                parts.append(values)
+            columns[column] = numpy.concatenate(parts)
+        owner = numpy.repeat(numpy.arange(len(tables)), [len(table) for table in tables])
+        # the sorts are stable, so rows stay in table order within a second
+        order = numpy.argsort(columns['timestamp'], kind='stable')
+        times = columns['timestamp'][order]
+        owners = owner[order]
+        second_start = numpy.ones(len(order), bool)
+        second_start[1:] = times[1:] != times[:-1]
+        starts = numpy.flatnonzero(second_start)
+        shared = (numpy.minimum.reduceat(owners, starts)
+                  != numpy.maximum.reduceat(owners, starts))[numpy.cumsum(second_start) - 1]
+        rows = order[shared]
+        if len(rows):
+            by_event = numpy.lexsort([columns[column][rows] for column in reversed(self.columns)])
+            event_start = numpy.zeros(len(rows), bool)
+            event_start[0] = True
+            for column in self.columns:
+                values = columns[column][rows[by_event]]
+                event_start[1:] |= values[1:] != values[:-1]
+            copies = owner[rows[by_event]]
+            run_start = event_start.copy()
+            run_start[1:] |= copies[1:] != copies[:-1]
+            # each run is one table's copies of one event
+            runs = numpy.flatnonzero(run_start)
+            run = numpy.cumsum(run_start) - 1
+            rank = numpy.arange(len(rows)) - runs[run]
+            counts = numpy.diff(numpy.append(runs, len(rows)))
+            event = (numpy.cumsum(event_start) - 1)[runs]
+            # the most copies of each event held by the tables up to each run, from
+            # a running maximum that cannot carry over from one event to the next
+            scale = int(counts.max()) + 1
+            most = numpy.maximum.accumulate(event*scale + counts) - event*scale
+            before = numpy.zeros(len(runs), most.dtype)
+            before[1:] = most[:-1]
+            before[event_start[runs]] = 0
+            keep = numpy.zeros(len(rows), bool)
+            keep[by_event[rank >= before[run]]] = True
+            dropped = numpy.zeros(len(order), bool)
+            dropped[shared] = ~keep
+            order = order[~dropped]
+        for column in self.columns:
+            values = getattr(self, column)
+            setattr(self, column, array.array(values.typecode, columns[column][order].astype(
+                values.typecode).tobytes()))
+    
+    def copy_rows(self, table, mapping, rows):
+        '''
+        Adds rows of another table to the end of this one.
+        Parameters:
+            table (LootTable): the table holding the rows
+            mapping (list): this table's code for each of the other table's strings
+            rows (range or list): the rows to copy, in chronological order
+        '''
+        for column in self.columns:
+            values = getattr(table, column)
+            output = getattr(self, column)
+            if isinstance(rows, range):
+                values = values[rows.start:rows.stop]
+                if column not in self.string_columns:
+                    output.frombytes(memoryview(values).cast('B'))
+                elif vectorize(values):
+                    output.frombytes(numpy.array(mapping, numpy.int32)[as_numpy(values)].tobytes())
+                else:
+                    output.extend(map(mapping.__getitem__, values))
+            elif column in self.string_columns:
+                output.extend(mapping[values[row]] for row in rows)
+            else:
+                output.extend(values[row] for row in rows)
+    
+    def __len__(self):
+        return len(self.timestamp)
+    
+    def __getitem__(self, idx):
+        '''
+        Builds a Loot object from one row of the table.
+        Parameter:
+            idx (int): the row
+        Returns:
+            Loot: the event at that row
+        '''
+        strings = self.strings
+        return Loot.from_fields(self.timestamp[idx], strings[self.interaction[idx]],
+                                strings[self.winner[idx]], strings[self.gain_item[idx]],
+                                self.gain_value[idx], strings[self.loss_item[idx]],
+                                self.loss_value[idx], strings[self.source[idx]],
+                                self.offset[idx])
+    
+    def __iter__(self):
+        if not self.ordered:
+            self.sort()
+        strings = self.strings
+        for row in zip(self.timestamp, self.interaction, self.winner, self.gain_item,
+                       self.gain_value, self.loss_item, self.loss_value, self.source,
+                       self.offset):
+            (ts, interaction, winner, gain_item, gain_value, loss_item, loss_value,
+             source, offset) = row
+            yield Loot.from_fields(ts, strings[interaction], strings[winner],
+                                   strings[gain_item], gain_value, strings[loss_item],
+                                   loss_value, strings[source], offset)
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['codes'], state['index'], state['rollup'], state['mapped']
+        for column in self.columns:
+            values = state[column]
+            if not isinstance(values, array.array):
+                state[column] = array.array(values.format, values)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.codes = {string:code for code,string in enumerate(self.strings)}
+        self.index = None
+        self.rollup = None
+        self.mapped = None
+        if 'source' not in state:
+            self.source = array.array('i', bytes(len(self.timestamp)*4))
+        if 'offset' not in state:
+            self.offset = array.array('q', bytes(len(self.timestamp)*8))
+        if 'ordered' not in state:
+            self.ordered = all(map(operator.le, self.timestamp,
+                                   itertools.islice(self.timestamp, 1, None)))
+    
+    def save(self, location):
+        '''
+        Writes the table to a file in the binary container format: a header,
+        the string table, each column as fixed-width values, and then
+        the rollup, which is built first if necessary.
+        The file is written under a temporary name and then moved into place.
+        A table loaded from a file is copied into memory first, since the
+        file it maps cannot be replaced on Windows while it is open.
+        Parameter:
+            location (str): where to save the table
+        '''
+        rollup = self.get_rollup()
+        encoded = [string.encode('utf-8') for string in self.strings]
+        lengths = array.array('I', map(len, encoded))
+        temp = location + '.tmp'
+        with open(temp, 'wb') as output:
+            output.write(file_header.pack(file_magic, FILE_VERSION, sys.byteorder == 'big',
+                                          len(encoded), len(self)))
+            output.write(lengths)
+            output.write(b''.join(encoded))
+            for column in self.columns:
+                output.write(bytes(-output.tell() % 8))
+                output.write(getattr(self, column))
+            rollup.write(output)
+        if self.mapped is not None:
+            self.thaw()
+        os.replace(temp, location)
+    
+    @classmethod
+    def load(cls, location):
+        '''
+        Opens a file written by save. The file is memory-mapped and the
+        columns are read-only views of it, so no per-event objects are
+        created until rows are read, and the columns are only copied
+        into memory if rows are added, which closes the file.
+        Parameter:
+            location (str): the file to load
+        Returns:
+            LootTable: the saved table
+        '''
+        with open(location, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < file_header.size or f.read(len(file_magic)) != file_magic:
+                raise ValueError('{} is not a saved loot table'.format(location))
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            buffer = memoryview(mapped)
+        magic, version, big, count, length = file_header.unpack_from(buffer)
+        if version not in (1, 2, 3, FILE_VERSION):
+            raise ValueError('{} has unsupported version {}'.format(location, version))
+        self = cls()
+        offset = file_header.size
+        lengths = array.array('I')
+        lengths.frombytes(buffer[offset:offset+count*lengths.itemsize])
+        if big != (sys.byteorder == 'big'):
+            lengths.byteswap()
+        offset += count*lengths.itemsize
+        self.strings = []
+        for string_length in lengths:
+            self.strings.append(str(buffer[offset:offset+string_length], 'utf-8'))
+            offset += string_length
+        self.codes = {string:code for code,string in enumerate(self.strings)}
+        # files before version 3 have no source column, and before version 4 no offset column
+        missing = ('source', 'offset') if version < 3 else ('offset',) if version < 4 else ()
+        for column in self.columns:
+            if column in missing:
+                continue
+            typecode = getattr(self, column).typecode
+            offset += -offset % 8
+            end = offset + length*array.array(typecode).itemsize
+            values = buffer[offset:end].cast(typecode)
+            if big != (sys.byteorder == 'big'):
+                values = array.array(typecode, values.tobytes())
+                values.byteswap()
+            setattr(self, column, values)
+            offset = end
+        if version < 3:
+            self.source = array.array('i', bytes(length*4))
+        if version < 4:
+            self.offset = array.array('q', bytes(length*8))
+        if version > 1:
+            self.rollup = Rollup.read(buffer, offset, big)
+            if self.rollup.zone != zone_name():
+                # local days from another timezone; rebuilt when next needed
+                self.rollup = None
+        self.mapped = mapped
+        return self
+    
+    def set_source(self, source, start=0):
+        '''
+        Marks where the rows at the end of the table came from.
+        Parameters:
+            source (str): the source, such as a character's name
+            start (int): the first row to mark
+        '''
+        if not isinstance(self.source, array.array):
+            self.thaw()
+        self.source[start:] = array.array('i', [self.intern(source)]) * (len(self) - start)
+        self.index = None
+    
+    def get_rollup(self, hourly=False):
+        '''
+        Returns the rollup of the table, building it first if necessary.
+        Parameter:
+            hourly (bool): whether the rollup needs hourly totals
+        Returns:
+            Rollup: the rollup, kept up to date as rows are added
+        '''
+        if not self.ordered:
+            self.sort()
+        if self.rollup is None or (hourly and not self.rollup.hourly):
+            self.rollup = Rollup(hourly)
+            self.rollup.add_rows(self)
+        return self.rollup
+    
+    def select(self, **filters):
+        '''
+        Finds the rows that match the given set of filters. The filters
+        are compiled once into tests on the columns: date bounds become a
+        bisected slice of the timestamps, so only rows in range are read, string
+        filters become sets of matching codes (so each regex runs once per
+        distinct string rather than once per event), and value bounds
+        become ranges. The most selective string test is answered from the
+        inverted index, and each other test is then applied to all remaining
+        rows at once.
+        Parameter:
+            **filters (unpacked dict): the desired filters, as for Container.get_loot
+        Returns:
+            range or list: the index of each matching row, in order
+        '''
+        extras = extra_filters(filters)
+        regex = extras['regex']
+        earliest = math.ceil((extras['min_date'] or earliest_date()).timestamp())
+        latest = math.floor((extras['max_date'] or current_date()).timestamp())
+        if not self.ordered:
+            self.sort()
+        rows = range(bisect.bisect_left(self.timestamp, earliest),
+                     bisect.bisect_right(self.timestamp, latest))
+        ranges = []
+        for column,low,high in ((self.gain_value, extras['min_gain'], extras['max_gain']),
+                                (self.loss_value, extras['max_loss'], extras['min_loss'])):
+            if rows and (low > self.lowest(column, rows) or high < self.highest(column, rows)):
+                ranges.append((column, range(low, high+1)))
+        tests, leftovers, items, both = self.string_tests(filters, extras['item'], regex)
+        if items is not None and not both:
+            tests.append((('gain_item', 'loss_item'), items))
+        if tests and rows:
+            size, best = min((self.frequency(*test), idx) for idx,test in enumerate(tests))
+            if size < len(rows) // 4:
+                rows = self.positions(*tests.pop(best), rows)
+        for column,allowed in ranges:
+            rows = self.keep(rows, column, allowed)
+        for columns,allowed in tests:
+            if len(columns) == 1:
+                rows = self.keep(rows, getattr(self, columns[0]), allowed)
+            else:
+                rows = self.keep_items(rows, allowed, False)
+        if both and len(rows):
+            rows = self.keep_items(rows, items, both)
+        if not isinstance(rows, (range, list)):
+            rows = rows.tolist()
+        if leftovers and rows:
+            rows = [row for row in rows if self.check(self[row], leftovers, regex)]
+        return rows
+    
+    def string_tests(self, filters, item='', regex=False):
+        '''
+        Compiles filters on the string columns into sets of matching codes.
+        Parameters:
+            filters (dict): each attribute mapped to its desired value
+            item (str or set): the desired gained or lost item, or '' for any
+            regex (bool): whether string values are regular expressions
+        Returns:
+            tuple (list, dict, set, bool): a ((column,), codes) test for each
+                string column, the filters on other attributes, the codes
+                matching item (None for any item), and whether events with
+                neither a gain nor a loss also match item
+        '''
+        tests = []
+        leftovers = {}
+        for k,v in filters.items():
+            if k not in self.string_columns:
+                leftovers[k] = v
+            elif regex:
+                search = re.compile(v).search
+                tests.append(((k,), self.matching(search)))
+            else:
+                tests.append(((k,), self.matching(
+                    lambda string: string == v or (string != '' and string in v))))
+        items = None
+        both = False
+        if item != '':
+            if regex:
+                search = re.compile(item).search
+                items = self.matching(search)
+            else:
+                items = self.matching(lambda string: string != '' and string in item)
+                both = '' in item
+        return tests, leftovers, items, both
+    
+    def get_index(self, column):
+        '''
+        Returns the inverted index of a string column, building
+        the indexes first if necessary.
+        Parameter:
+            column (str): the name of the column
+        Returns:
+            dict: each code mapped to an array of the rows holding it, in order
+        '''
+        if self.index is None:
+            self.build_index()
+        return self.index[column]
+    
+    def build_index(self, start=0):
+        '''
+        Adds rows to the inverted index of every string column.
+        Parameter:
+            start (int): the first row to add; the indexes are rebuilt
+                from scratch if they do not exist yet
+        '''
+        if self.index is None:
+            self.index = {column:{} for column in self.string_columns}
+            start = 0
+        for column in self.string_columns:
+            index = self.index[column]
+            values = getattr(self, column)
+            if vectorize(values):
+                codes = as_numpy(values)[start:]
+                order = numpy.argsort(codes, kind='stable')
+                grouped = codes[order]
+                bounds = numpy.flatnonzero(numpy.diff(grouped)) + 1
+                for rows in numpy.split((order + start).astype(numpy.int32), bounds):
+                    if len(rows):
+                        index.setdefault(int(values[rows[0]]), array.array('i')).frombytes(
+                            rows.tobytes())
+            else:
+                for row,code in enumerate(values[start:], start):
+                    positions = index.get(code)
+                    if positions is None:
+                        positions = index[code] = array.array('i')
+                    positions.append(row)
+    
+    def frequency(self, columns, codes):
+        '''
+        Counts the rows holding any of the given codes, from the index.
+        Parameters:
+            columns (tuple): the names of the columns to count in
+            codes (set): the codes to count
+        Returns:
+            int: the number of matching rows in the whole table
+        '''
+        total = 0
+        for column in columns:
+            index = self.get_index(column)
+            total += sum(len(index.get(code, ())) for code in codes)
+        return total
+    
+    def positions(self, columns, codes, rows):
+        '''
+        Looks up the rows holding any of the given codes in the index,
+        touching only the rows that match.
+        Parameters:
+            columns (tuple): the names of the columns to look in
+            codes (set): the codes to look for
+            rows (range): the slice of rows to search
+        Returns:
+            list or ndarray: the matching rows, in order
+        '''
+        parts = []
+        for column in columns:
+            index = self.get_index(column)
+            for code in codes:
+                found = index.get(code)
+                if found:
+                    low = bisect.bisect_left(found, rows.start)
+                    high = bisect.bisect_left(found, rows.stop)
+                    if high > low:
+                        parts.append(found[low:high])
+        if vectorize(self.timestamp):
+            if not parts:
+                return numpy.array([], numpy.int32)
+            found = numpy.concatenate([as_numpy(part) for part in parts])
+            return numpy.unique(found) if len(parts) > 1 else found
+        if len(columns) > 1:
+            return sorted(set(itertools.chain.from_iterable(parts)))
+        return sorted(itertools.chain.from_iterable(parts))
+    
+    def item_counts(self, rows):
+        '''
+        Counts how many times each item was gained or lost in some rows.
+        For the whole table the counts come straight from the index.
+        Items are ordered by first appearance, losses before gains.
+        Parameter:
+            rows (range or list): the rows to count
+        Returns:
+            Counter: each item with its number of appearances
+        '''
+        strings = self.strings
+        if isinstance(rows, range) and rows == range(len(self)):
+            counts = {}
+            firsts = {}
+            for column,rank in (('loss_item', 0), ('gain_item', 1)):
+                for code,found in self.get_index(column).items():
+                    if code and found:
+                        counts[code] = counts.get(code, 0) + len(found)
+                        firsts[code] = min(firsts.get(code, (math.inf,)), (found[0], rank))
+        elif vectorize(self.timestamp):
+            counts = {}
+            firsts = {}
+            for column,rank in (('loss_item', 0), ('gain_item', 1)):
+                values = getattr(self, column)
+                codes = as_numpy(values)[rows]
+                for code,first,count in zip(*map(numpy.ndarray.tolist, numpy.unique(
+                                          codes, return_index=True, return_counts=True))):
+                    if code:
+                        counts[code] = counts.get(code, 0) + count
+                        firsts[code] = min(firsts.get(code, (math.inf,)), (first, rank))
+        else:
+            gain_item = self.gain_item
+            loss_item = self.loss_item
+            return collections.Counter(strings[code] for row in rows
+                                       for code in (loss_item[row], gain_item[row]) if code)
+        return collections.Counter({strings[code]:counts[code]
+                                    for code in sorted(counts, key=firsts.get)})
+    
+    @staticmethod
+    def keep(rows, column, allowed):
+        '''
+        Narrows down rows to those whose value in a column is allowed,
+        using NumPy when it is available.
+        Parameters:
+            rows (range, list or ndarray): the candidate rows, in order
+            column (array): the column to test
+            allowed (set or range): the allowed values
+        Returns:
+            list or ndarray: the rows that passed, in order
+        '''
+        if vectorize(column):
+            values = as_numpy(column)
+            if isinstance(rows, range):
+                values = values[rows.start:rows.stop]
+            else:
+                values = values[rows]
+            if isinstance(allowed, range):
+                mask = (values >= allowed.start) & (values < allowed.stop)
+            else:
+                mask = numpy.isin(values, numpy.fromiter(allowed, numpy.int64, len(allowed)))
+            if isinstance(rows, range):
+                return numpy.flatnonzero(mask) + rows.start
+            return rows[mask]
+        if isinstance(rows, range):
+            values = column[rows.start:rows.stop]
+        else:
+            values = map(column.__getitem__, rows)
+        return list(itertools.compress(rows, map(allowed.__contains__, values)))
+    
+    def keep_items(self, rows, items, both):
+        '''
+        Narrows down rows to those whose gained or lost item is allowed,
+        using NumPy when it is available.
+        Parameters:
+            rows (range, list or ndarray): the candidate rows, in order
+            items (set): the allowed item codes
+            both (bool): whether to also keep rows with neither a gain nor a loss
+        Returns:
+            list or ndarray: the rows that passed, in order
+        '''
+        if vectorize(self.gain_item):
+            if isinstance(rows, range):
+                rows = numpy.arange(rows.start, rows.stop)
+            gains = as_numpy(self.gain_item)[rows]
+            losses = as_numpy(self.loss_item)[rows]
+            allowed = numpy.fromiter(items, numpy.int64, len(items))
+            mask = numpy.isin(gains, allowed) | numpy.isin(losses, allowed)
+            if both:
+                mask |= (gains == 0) & (losses == 0)
+            return rows[mask]
+        gain_item = self.gain_item
+        loss_item = self.loss_item
+        return [row for row in rows if gain_item[row] in items or loss_item[row] in items or
+                (both and not gain_item[row] and not loss_item[row])]
+    
+    @staticmethod
+    def lowest(column, rows):
+        '''
+        Returns the smallest value in a slice of a column.
+        Parameters:
+            column (array): the column
+            rows (range): a non-empty slice of rows
+        Returns:
+            int: the smallest value
+        '''
+        if vectorize(column):
+            return int(as_numpy(column)[rows.start:rows.stop].min())
+        return min(column[rows.start:rows.stop])
+    
+    @staticmethod
+    def highest(column, rows):
+        '''
+        Returns the largest value in a slice of a column.
+        Parameters:
+            column (array): the column
+            rows (range): a non-empty slice of rows
+        Returns:
+            int: the largest value
+        '''
+        if vectorize(column):
+            return int(as_numpy(column)[rows.start:rows.stop].max())
+        return max(column[rows.start:rows.stop])
+    
+    def matching(self, test):
+        '''
+        Returns the codes of every interned string that passes a test.
+        Parameter:
+            test (function): takes a string and returns whether it matches
+        Returns:
+            set: the matching codes
+        '''
+        return {code for code,string in enumerate(self.strings) if test(string)}
+    
+    @staticmethod
+    def check(event, filters, regex):
+        '''
+        Tests a single Loot object against attribute filters that have
+        no column of their own, such as gain_value.
+        Parameters:
+            event (Loot): the event to test
+            filters (dict): each attribute mapped to its desired value
+            regex (bool): whether string values are regular expressions
+        Returns:
+            bool: whether the event passes every filter
+        '''
+        for k,v in filters.items():
+            atr = getattr(event, k)
+            if regex:
+                if isinstance(atr, str) and not re.search(v, atr):
+                    return False
+            elif atr != v and (atr == '' or atr not in v):
+                return False
+        return True
+
+class Container:
+    '''
+    A container that holds Loot objects and has analysis methods.
+    Attributes:
+        bag (LootTable): stores all the Loot objects
+        stats (Stats): records the time spent selecting rows, or None
+        cache (OrderedDict): the results of recent queries, least
+            recently used first; emptied whenever the bag changes
+        cache_size (int): the most query results to keep
+    '''
+    stats = None
+    cache_size = 16
+    
+    def __init__(self):
+        self.bag = LootTable()
+        self.cache = collections.OrderedDict()
+    
+    def add(self, loot):
+        '''
+        Adds a Loot object to the Container's bag.
+        Parameter:
+            loot (Loot): the Loot object to add to the bag
+        '''
+        if self.cache:
+            self.cache.clear()
+        self.bag.append(loot)
+    
+    def __add__(self, other):
+        '''
+        Adds two Container objects together without copying either. The
+        result is a Chain rather than a Container, so it answers queries but
+        cannot be added to; materialize() copies it into a Container, and
+        extend adds another Container's events in place.
+        Parameter:
+            other (Container, View or Chain): the events to add to this one's
+        Returns:
+            Chain: this Container's events and the other's, read as one
+        '''
+        return Chain(self, other)
+    
+    def extend(self, other):
+        '''
+        Adds another Container's bag onto this one's. Events that both
+        hold are kept twice; merged drops them.
+        Parameter:
+            other (Container): the Container to add to this one
+        '''
+        self.cache.clear()
+        self.bag.extend(other.bag)
+    
+    @classmethod
+    def merged(cls, containers):
+        '''
+        Merges Containers into a new one, dropping the events that more than
+        one of them holds, so that overlapping imports can be combined.
+        Parameter:
+            containers (list): the Containers to merge
+        Returns:
+            Container: the merged events
+        '''
+        temp = cls()
+        temp.bag = LootTable.merged([container.bag for container in containers])
+        return temp
+    
+    def __len__(self):
+        '''
+        Returns the number of Loot events in the Container's bag.
+        Returns:
+            int: the size of the bag
+        '''
+        return len(self.bag)
+    
+    def save(self, location):
+        '''
+        Saves the Container's bag in the binary container format.
+        Parameter:
+            location (str): where to save the Container
+        '''
+        self.bag.save(location)
+    
+    @classmethod
+    def load(cls, location):
+        '''
+        Loads a Container saved with save. The events stay in the
+        memory-mapped file until they are read.
+        Parameter:
+            location (str): the file to load
+        Returns:
+            Container: the saved Container
+        '''
+        temp = cls()
+        temp.bag = LootTable.load(location)
+        return temp
+    
+    @classmethod
+    def load_pickle(cls, location):
+        '''
+        Loads a Container pickled by an older version, through
+        restricted_load so that the file cannot run any code.
+        Parameter:
+            location (str): the file to load
+        Returns:
+            Container: the saved Container
+        '''
+        import pickle
+        with open(location, 'rb') as f:
+            temp = restricted_load(f)
+        if not isinstance(temp, cls):
+            raise pickle.UnpicklingError('{} does not hold a Container'.format(location))
+        return temp
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache = collections.OrderedDict()
+        if isinstance(self.bag, list):
+            # pickled by an older version, which kept a list of Loot objects
+            table = LootTable()
+            table.extend(self.bag)
+            self.bag = table
+    
+    def __bool__(self):
+        '''
+        Indicates whether there is anything in the Container's bag.
+        Returns:
+            bool: whether the bag is non-empty
+        '''
+        return bool(self.bag)
+        
+    def __iter__(self):
+        '''
+        Returns an iterator so we can iterate directly over the Container.
+        Returns:
+            iter: an iterator for this Container's bag
+        '''
+        return iter(self.bag)
+    
+    def where(self, **filters):
+        '''
+        Picks out the events that match a set of filters, without copying them.
+        Example:
+            container.where(gain_item='Dilithium Ore').by_day().totals()
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Returns:
+            View: the matching events
+        '''
+        return View(self, **filters)
+    
+    def by_day(self, UTC=False):
+        '''
+        Splits the events into daily buckets, which are only computed when read.
+        Parameter:
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+        Returns:
+            Buckets: the daily buckets
+        '''
+        return Buckets(self, False, UTC)
+    
+    def by_hour(self, UTC=False):
+        '''
+        Splits the events into hourly buckets, which are only computed when read.
+        Parameter:
+            UTC (bool): whether to separate buckets by local hour or by UTC hour
+        Returns:
+            Buckets: the hourly buckets
+        '''
+        return Buckets(self, True, UTC)
+    
+    @memoized
+    def select(self, **filters):
+        '''
+        Finds the rows of the bag that match the given set of filters.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Returns:
+            range or list: the index of each matching row, in order
+        '''
+        if self.stats is None:
+            return self.bag.select(**filters)
+        with self.stats.stage('select'):
+            rows = self.bag.select(**filters)
+        self.stats.counts['rows selected'] += len(rows)
+        return rows
+    
+    def get_loot(self, **filters):
+        '''
+        Yields all the Loot objects that match the given set of filters.
+        Example:
+            for item in container.get_loot(gain_item='Contraband'):
+                print(item)
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Yields:
+            Loot: each matching Loot item
+        '''
+        bag = self.bag
+        for row in self.select(**filters):
+            yield bag[row]
+    
+    def get_winners(self, **filters):
+        '''
+        Yields loot events that were a lockbox win.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Yields:
+            Loot: each matching Loot item
+        '''
+        bag = self.bag
+        winner = bag.winner
+        for row in self.select(**filters):
+            if winner[row]:
+                yield bag[row]
+    
+    def average_value_per_event(self, loss=False, **filters):
+        '''
+        Returns the average value out of all matching loot events.
+        Parameters:
+            loss (bool): whether we want the losses instead of the default gains
+            **filters (unpacked dict): the desired filters
+        Returns:
+            number: the average value for these loot events
+        '''
+        rows = self.select(**filters)
+        values = self.bag.loss_value if loss else self.bag.gain_value
+        return sum(map(values.__getitem__, rows))/len(rows)
+    
+    def event_quantity(self, loss=False, **filters):
+        '''
+        Returns the number of events that match the given filters.
+        Parameters:
+            loss (bool): whether we want the losses instead of the default gains
+            **filters (unpacked dict): the desired filters
+        Returns:
+            int: number of matching loot events for these filters
+        '''
+        items = self.bag.loss_item if loss else self.bag.gain_item
+        return sum(1 for row in self.select(**filters) if items[row])
+    
+    def total_value(self, loss=False, **filters):
+        '''
+        Returns the total value of the matching loot events.
+        Parameters:
+            loss (bool): whether we want the losses instead of the default gains
+            **filters (unpacked dict): the desired filters
+        Yields:
+            int: the total value of these loot events
+        '''
+        values = self.bag.loss_value if loss else self.bag.gain_value
+        return sum(map(values.__getitem__, self.select(**filters)))
+    
+    def group_by_day(self, UTC=False, **filters):
+        '''
+        Yields buckets of Loot events separated by day.
+        Parameters:
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+            **filters (unpacked dict): the desired filters
+        Yields:
+            tuple (datetime, Events): The start date for this bucket and
+                this bucket's Loot objects, which are built as they are read
+        '''
+        for number,start_date,table,rows in self.bucket_rows(False, UTC, **filters):
+            yield start_date, Events((table, rows))
+    
+    def group_by_hour(self, UTC=False, **filters):
+        '''
+        Yields buckets of Loot events separated by hour.
+        Parameters:
+            UTC (bool): whether to separate buckets by local hour or by UTC hour
+            **filters (unpacked dict): the desired filters
+        Yields:
+            tuple (datetime, Events): The start date for this bucket and
+                this bucket's Loot objects, which are built as they are read
+        '''
+        for number,start_date,table,rows in self.bucket_rows(True, UTC, **filters):
+            yield start_date, Events((table, rows))
+    
+    def bucket_rows(self, hourly=False, UTC=False, **filters):
+        '''
+        Splits the matching rows of the bag into daily or hourly buckets.
+        Parameters:
+            hourly (bool): whether buckets are hours rather than days
+            UTC (bool): whether buckets are UTC days or hours
+            **filters (unpacked dict): the desired filters
+        Yields:
+            tuple (int, datetime, LootTable, range or list): the number of
+                each bucket, its start date, the bag and the bucket's rows
+        '''
+        bag = self.bag
+        timestamp = bag.timestamp
+        number = hour_number if hourly else day_number
+        rows = self.select(**filters)
+        first = 0
+        current = None
+        for idx,row in enumerate(rows):
+            bucket = number(timestamp[row], UTC)
+            if bucket != current:
+                if idx:
+                    yield current, start_date, bag, rows[first:idx]
+                first = idx
+                current = bucket
+                start_date = day_start(timestamp[row], UTC)
+        if rows:
+            yield current, start_date, bag, rows[first:]
+    
+    @memoized
+    def daily_totals(self, sales_loss=False, UTC=False, **filters):
+        '''
+        Adds up the matching loot events for each day.
+        The result holds the daily totals, cumulative totals and daily
+        averages, so one call can serve several reports.
+        Parameters:
+            sales_loss (bool): whether to show the sold items in the results
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+            **filters (unpacked dict): the desired filters
+        Returns:
+            DailyTotals: the totals for each day
+        '''
+        return self.bucket_totals(False, sales_loss, UTC, filters)
+    
+    @memoized
+    def hourly_totals(self, sales_loss=False, UTC=False, **filters):
+        '''
+        Adds up the matching loot events for each hour.
+        Parameters:
+            sales_loss (bool): whether to show the sold items in the results
+            UTC (bool): whether to separate buckets by local hour or by UTC
+                hour, which only differ in timezones offset by part of an hour
+            **filters (unpacked dict): the desired filters
+        Returns:
+            DailyTotals: the totals for each hour
+        '''
+        return self.bucket_totals(True, sales_loss, UTC, filters)
+    
+    def bucket_totals(self, hourly, sales_loss, UTC, filters):
+        '''
+        Reads daily or hourly totals from the bag's rollup when it can
+        answer the filters, and otherwise adds up the matching events.
+        Parameters:
+            hourly (bool): whether buckets are hours rather than days
+            sales_loss (bool): whether to show the sold items in the results
+            UTC (bool): whether buckets are UTC days or hours
+            filters (dict): the desired filters
+        Returns:
+            DailyTotals: the totals for each bucket
+        '''
+        totals = None
+        if Rollup.filters.issuperset(filters):
+            with self.stats.stage('rollup') if self.stats else contextlib.nullcontext():
+                totals = self.bag.get_rollup(hourly).totals(self.bag, filters, sales_loss=sales_loss,
+                                                             UTC=UTC, hourly=hourly)
+        if totals is None:
+            totals = DailyTotals(sales_loss=sales_loss, UTC=UTC, hourly=hourly)
+            totals.add_rows(self.bag, self.select(**filters))
+        return totals
+    
+    def totals_by_day(self, sales_loss=False, UTC=False, **filters):
+        '''
+        Adds up all the events in each daily bucket.
+        Parameters:
+            sales_loss (bool): whether to show the sold items in the results
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+            **filters (unpacked dict): the desired filters
+        Yields:
+            tuple (datetime, dict, dict): The start date for this bucket,
+                a dictionary of gain loot events and their values, and
+                a dictionary of loss loot events and their values
+        '''
+        yield from self.daily_totals(sales_loss=sales_loss, UTC=UTC, **filters)
+    
+    def cumulative_totals(self, sales_loss=False, UTC=False, **filters):
+        '''
+        Yields the cumulative totals for each successive daily bucket.
+        Parameters:
+            sales_loss (bool): whether to show the sold items in the results
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+            **filters (unpacked dict): the desired filters
+        Yields:
+            tuple (datetime, Counter): The start date for this bucket, and
+                a Counter holding the current cumulative total
+        '''
+        yield from self.daily_totals(sales_loss=sales_loss, UTC=UTC, **filters).cumulative()
+    
+    def average_totals(self, sales_loss=False, UTC=False, **filters):
+        '''
+        Returns a dictionary with the average daily value for each matching item.
+        Parameters:
+            sales_loss (bool): whether to show the sold items in the results
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+            **filters (unpacked dict): the desired filters
+        Returns:
+            dict: the matching items with their average daily value
+        '''
+        return self.daily_totals(sales_loss=sales_loss, UTC=UTC, **filters).averages()
+    
+    def counter(self, **filters):
+        '''
+        Returns a Counter with the number of times each loot item appeared.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Returns:
+            Counter: each item with their number of appearances
+        '''
+        return self.bag.item_counts(self.select(**filters))
+        
+    def common(self, least=False, counter=None, **filters):
+        '''
+        Returns the most or least common item, by number of loot events.
+        Parameters:
+            least (bool): get the least common item, rather than the default most
+            counter (Counter): send a Counter object to avoid having to make it again
+            **filters (unpacked dict): the desired filters
+        Returns:
+            str: the most or least common item, by number of loot events
+        '''
+        if counter:
+            return counter.most_common()[-1*least]
+        return self.counter(**filters).most_common()[-1*least]
+    
+    def dabo(self, sessions=None, **filters):
+        '''
+        Yields each Dabo bet with its result, paired in one pass in time order,
+        so a missing bet or result line only loses its own pair.
+        Parameters:
+            sessions (DaboSessions): adds up the pairs into sessions as
+                they are yielded, or None
+            **filters (unpacked dict): the desired filters
+        Yields:
+            tuple (Loot, Loot): each bet and its win or loss
+        '''
+        filters['interaction'] = set(DaboSessions.interactions)
+        bag = self.bag
+        if sessions is None:
+            sessions = DaboSessions()
+        for bet,result in sessions.pairs(bag, self.select(**filters)):
+            yield bag[bet], bag[result]
+    
+    def dabo_sessions(self, gap=None, **filters):
+        '''
+        Adds up Dabo gambling into sessions.
+        Parameters:
+            gap (int): the most seconds between bets in one session,
+                or None for DaboSessions.gap
+            **filters (unpacked dict): the desired filters
+        Returns:
+            DaboSessions: the sessions
+        '''
+        sessions = DaboSessions() if gap is None else DaboSessions(gap)
+        filters['interaction'] = set(DaboSessions.interactions)
+        collections.deque(sessions.pairs(self.bag, self.select(**filters)), maxlen=0)
+        return sessions
+    
+    def report(self, name, sales_loss=False, UTC=False, **filters):
+        '''
+        Builds one of the standard reports, for write_report or export_report.
+        The rows are computed as they are read.
+        Parameters:
+            name (str): 'averages', 'totals', 'cumulative', 'winners', 'dabo'
+                or 'sessions'
+            sales_loss (bool): whether the daily reports count sales as losses
+            UTC (bool): whether the daily reports use UTC days
+            **filters (unpacked dict): the desired filters
+        Returns:
+            tuple (list, iter): the name of each column and the rows
+        '''
+        if name == 'winners':
+            # read straight from the columns rather than building Loot objects
+            bag = self.bag
+            timestamp, winner, gain_item, strings = (bag.timestamp, bag.winner,
+                                                     bag.gain_item, bag.strings)
+            return ['Date', 'Winner', 'Item'], ((local_datetime(timestamp[row]),
+                                                 strings[winner[row]], strings[gain_item[row]])
+                                                for row in self.select(**filters) if winner[row])
+        if name == 'dabo':
+            return ['Bet', 'Won'], ((l.loss_value, g.gain_value) for l,g in self.dabo(**filters))
+        if name == 'sessions':
+            return ['Start', 'End', 'Bets', 'Wagered', 'Payout', 'Net', 'Wins',
+                    'Longest winning streak', 'Longest losing streak'], (
+                (local_datetime(session.start), local_datetime(session.end), session.bets,
+                 session.wagered, session.payout, session.net, session.wins,
+                 session.longest_win, session.longest_loss)
+                for session in self.dabo_sessions(**filters))
+        if name not in ('averages', 'totals', 'cumulative'):
+            raise ValueError('Unknown report: {}'.format(name))
+        totals = self.daily_totals(sales_loss=sales_loss, UTC=UTC, **filters)
+        if name == 'averages':
+            return ['Item', 'Average value per day'], totals.averages().items()
+        headers = totals.headers()
+        days = totals.combined() if name == 'totals' else totals.cumulative()
+        return ['Date', *headers], ((d.strftime('%Y-%m-%d'), *map(c.get, headers))
+                                    for d,c in days)
+    
+    def sources(self):
+        '''
+        Splits the events by source, such as the characters whose pasted
+        logs were read, without copying them.
+        Returns:
+            dict: each source mapped to a View of its events, by name
+        '''
+        strings = self.bag.strings
+        index = self.bag.get_index('source')
+        return {strings[code]:View(self, source={strings[code]})
+                for code in sorted(index, key=strings.__getitem__) if code and index[code]}
+    
+    def __str__(self):
+        return '\n'.join(str(item) for item in self)
+    
+    def __repr__(self):
+        return str(self)
+
+class View:
+    '''
+    A read-only selection of a Container's events, such as the events from
+    one source. It holds filters rather than events, so it shares the
+    Container's LootTable, and each query's filters can only narrow it,
+    as with where, before it is answered (and cached) by the Container.
+    Attributes:
+        container (Container): the Container holding the events
+        filters (dict): the filters that pick out the view's events
+    '''
+    queries = frozenset(('select', 'get_loot', 'get_winners', 'average_value_per_event',
+                         'event_quantity', 'total_value', 'group_by_day', 'group_by_hour',
+                         'bucket_rows', 'daily_totals', 'hourly_totals', 'totals_by_day',
+                         'cumulative_totals', 'average_totals', 'counter', 'common', 'dabo',
+                         'dabo_sessions', 'report'))
+    # filters that are bounds, which narrow to the later lower bound
+    # or the earlier upper bound when a view is narrowed
+    lower_bounds = ('min_date', 'min_gain', 'max_loss')
+    upper_bounds = ('max_date', 'max_gain', 'min_loss')
+    
+    def __init__(self, container, **filters):
+        self.container = container
+        self.filters = filters
+    
+    def where(self, **filters):
+        '''
+        Narrows the view with more filters. A bound given twice keeps the
+        narrower bound, and any other filter given twice keeps the values
+        that match both, which may be none at all.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Returns:
+            View: the events of this view that also match the filters
+        '''
+        narrowed = dict(self.filters)
+        regex = narrowed.get('regex', False)
+        if filters.get('regex', regex) != regex:
+            raise ValueError('Cannot narrow a view with regex={!r} using regex={!r}'.format(
+                regex, filters['regex']))
+        for k,v in filters.items():
+            if v is None or (k == 'item' and v == ''):
+                narrowed.setdefault(k, v)
+            elif narrowed.get(k) is None or narrowed[k] == v or (k == 'item' and narrowed[k] == ''):
+                narrowed[k] = v
+            elif k in self.lower_bounds:
+                narrowed[k] = max(narrowed[k], v)
+            elif k in self.upper_bounds:
+                narrowed[k] = min(narrowed[k], v)
+            elif regex:
+                narrowed[k] = r'^(?=[\s\S]*?(?:{}))(?=[\s\S]*?(?:{}))'.format(narrowed[k], v)
+            else:
+                both = self.matches(narrowed[k]) & self.matches(v)
+                if k == 'item' and '' in narrowed[k] and '' in v:
+                    both |= {''}
+                narrowed[k] = both
+        return View(self.container, **narrowed)
+    
+    @staticmethod
+    def matches(value):
+        '''
+        Returns every value that a plain (not regex) filter matches. As in
+        LootTable.check, a string matches itself and any string it contains,
+        and a set matches its members other than the empty string.
+        Parameter:
+            value (str, set or int): the filter's value
+        Returns:
+            frozenset: the matching values
+        '''
+        if isinstance(value, str):
+            return frozenset([value]) | frozenset(value[i:j] for i in range(len(value))
+                                                  for j in range(i + 1, len(value) + 1))
+        if isinstance(value, (set, frozenset, list, tuple)):
+            return frozenset(value) - {''}
+        return frozenset([value])
+    
+    def by_day(self, UTC=False):
+        '''
+        Splits the view into daily buckets, which are only computed when read.
+        Parameter:
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+        Returns:
+            Buckets: the daily buckets
+        '''
+        return Buckets(self, False, UTC)
+    
+    def by_hour(self, UTC=False):
+        '''
+        Splits the view into hourly buckets, which are only computed when read.
+        Parameter:
+            UTC (bool): whether to separate buckets by local hour or by UTC hour
+        Returns:
+            Buckets: the hourly buckets
+        '''
+        return Buckets(self, True, UTC)
+    
+    def __add__(self, other):
+        '''
+        Adds the view to other events without copying either.
+        Parameter:
+            other (Container, View or Chain): the events to add to the view's
+        Returns:
+            Chain: the view's events and the other's, read as one
+        '''
+        return Chain(self, other)
+    
+    def __getattr__(self, name):
+        if name not in self.queries:
+            raise AttributeError(name)
+        method = getattr(self.container, name)
+        @functools.wraps(method)
+        def query(*args, **filters):
+            return method(*args, **self.where(**filters).filters)
+        return query
+    
+    def materialize(self):
+        '''
+        Copies the view's events into a Container of their own.
+        Returns:
+            Container: the matching events
+        '''
+        temp = Container()
+        table = self.container.bag
+        rows = self.select()
+        temp.bag.copy_rows(table, [temp.bag.intern(string) for string in table.strings], rows)
+        return temp
+    
+    def __len__(self):
+        '''
+        Returns the number of events in the view.
+        Returns:
+            int: the number of matching events
+        '''
+        return len(self.select())
+    
+    def __iter__(self):
+        '''
+        Returns an iterator over the view's Loot objects.
+        Returns:
+            iter: an iterator of the matching events, in order
+        '''
+        return self.get_loot()
+    
+    def __repr__(self):
+        return 'View({})'.format(', '.join('{}={!r}'.format(k, v) for k,v in self.filters.items()))
+
+class Chain:
+    '''
+    Containers and Views read as one, without copying their events, as
+    returned by adding them together. Each query is answered (and cached)
+    by every part and the results are combined, so daily totals still come
+    from each part's rollup and events are merged into time order as they
+    are read. Dabo bets are only paired within a part, since parts are
+    usually different characters.
+    Attributes:
+        parts (list): the Containers and Views, with any Chains flattened
+    '''
+    def __init__(self, *parts):
+        self.parts = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, Chain) else [part])
+    
+    def __add__(self, other):
+        return Chain(self, other)
+    
+    def materialize(self):
+        '''
+        Copies the events of every part into a single Container, for
+        callers that need to add to the events or save them.
+        Returns:
+            Container: the events of every part, in time order
+        '''
+        temp = Container()
+        for part in self.parts:
+            temp.extend(part if isinstance(part, Container) else part.materialize())
+        return temp
+    
+    def save(self, location):
+        '''
+        Saves the events of every part as one Container, in the binary
+        container format.
+        Parameter:
+            location (str): where to save the Container
+        '''
+        self.materialize().save(location)
+    
+    def __len__(self):
+        '''
+        Returns the number of Loot events in every part.
+        Returns:
+            int: the number of events
+        '''
+        return sum(map(len, self.parts))
+    
+    def __iter__(self):
+        '''
+        Returns an iterator over the Loot events of every part, in time order.
+        Returns:
+            iter: an iterator of the events
+        '''
+        return self.get_loot()
+    
+    def where(self, **filters):
+        '''
+        Picks out the events that match a set of filters, without copying them.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Returns:
+            Chain: the matching events of each part
+        '''
+        return Chain(*(part.where(**filters) for part in self.parts))
+    
+    def by_day(self, UTC=False):
+        '''
+        Splits the events into daily buckets, which are only computed when read.
+        Parameter:
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
         Returns:
-            bool: whether the bag is non-empty
+            Buckets: the daily buckets
         '''
-        return bool(self.bag)
-        
-    def __iter__(self):
+        return Buckets(self, False, UTC)
+    
+    def by_hour(self, UTC=False):
         '''
-        Returns an iterator so we can iterate directly over the Container.
+        Splits the events into hourly buckets, which are only computed when read.
+        Parameter:
+            UTC (bool): whether to separate buckets by local hour or by UTC hour
         Returns:
-            iter: an iterator for this Container's bag
+            Buckets: the hourly buckets
         '''
-        return iter(self.bag)
+        return Buckets(self, True, UTC)
     
     def get_loot(self, **filters):
         '''
         Yields all the Loot objects that match the given set of filters.
-        Example:
-            for item in container.get_loot(gain_item='Contraband'):
-                print(item)
         Parameter:
             **filters (unpacked dict): the desired filters
         Yields:
-            Loot: each matching Loot item
+            Loot: each matching Loot item, in time order
         '''
-        extras = {k:filters.pop(k) if k in filters else v
-                for k,v in (('item', ''),
-                            ('regex', False),
-                            ('min_date', min_date), ('max_date', now),
-                            ('min_gain', 0), ('max_gain', 10000000000),
-                            ('min_loss', 0), ('max_loss', -10000000000))}
-        for event in self:
-            for k,v in filters.items():
-                atr = getattr(event, k)
-                if extras['regex']:
-                    if isinstance(atr, str) and not re.search(v, atr):
-                        success = False
-                        break
-                elif atr != v and (atr == '' or atr not in v):
-                        success = False
-                        break
-            else:
-                success = True
-            if extras['item']:
-                if extras['regex']:
-                    if (not re.search(extras['item'], event.gain_item) and
-                    not re.search(extras['item'], event.loss_item)):
-                        success = False
-                elif ((event.gain_item not in extras['item'] and 
-                      event.loss_item not in extras['item']) or
-                       (not event.gain_item and event.loss_item not in extras['item']) or
-                       (not event.loss_item and event.gain_item not in extras['item'])):
-                    success = False
-            if (extras['min_date'] <= event.datetime <= extras['max_date']
-            ) and (extras['min_gain'] <= event.gain_value <= extras['max_gain']
-            ) and (extras['max_loss'] <= event.loss_value <= extras['min_loss']) and success:
-                yield event
-                
+        return heapq.merge(*(part.get_loot(**filters) for part in self.parts),
+                           key=operator.attrgetter('timestamp'))
+    
     def get_winners(self, **filters):
         '''
         Yields loot events that were a lockbox win.
         Parameter:
             **filters (unpacked dict): the desired filters
         Yields:
-            Loot: each matching Loot item
+            Loot: each matching Loot item, in time order
         '''
-        for item in self.get_loot(**filters):
-            if item.winner:
-                yield item
+        return heapq.merge(*(part.get_winners(**filters) for part in self.parts),
+                           key=operator.attrgetter('timestamp'))
     
     def average_value_per_event(self, loss=False, **filters):
         '''
@@ -205,15 +2893,8 @@ class Container:
         Returns:
             number: the average value for these loot events
         '''
-        total = 0
-        length = 0
-        for item in self.get_loot(**filters):
-            if loss:
-                total += item.loss_value
-            else:
-                total += item.gain_value
-            length += 1
-        return total/length
+        return (self.total_value(loss, **filters)
+                / sum(len(part.select(**filters)) for part in self.parts))
     
     def event_quantity(self, loss=False, **filters):
         '''
@@ -224,8 +2905,7 @@ class Container:
         Returns:
             int: number of matching loot events for these filters
         '''
-        return sum(1 for item in self.get_loot(**filters) if (
-                    item.loss_item and loss) or (item.gain_item and not loss))
+        return sum(part.event_quantity(loss, **filters) for part in self.parts)
     
     def total_value(self, loss=False, **filters):
         '''
@@ -233,11 +2913,10 @@ class Container:
         Parameters:
             loss (bool): whether we want the losses instead of the default gains
             **filters (unpacked dict): the desired filters
-        Yields:
+        Returns:
             int: the total value of these loot events
         '''
-        return sum(item.loss_value if loss else item.gain_value for item in
-                    self.get_loot(**filters))
+        return sum(part.total_value(loss, **filters) for part in self.parts)
     
     def group_by_day(self, UTC=False, **filters):
         '''
@@ -247,93 +2926,73 @@ class Container:
                 or by UTC calendar day
             **filters (unpacked dict): the desired filters
         Yields:
-            tuple (datetime, list): The start date for this bucket and
-                the list containing this bucket's Loot objects
-        '''
-        bucket = []
-        loot = iter(self.get_loot(**filters))
-        item = next(loot)
-        bucket.append(item)
-        start_date = item.datetime
-        if UTC:
-            start_date -= start_date.utcoffset()
-        d = start_date.day
-        for item in loot:
-            if d == ((item.datetime-item.datetime.utcoffset()) if UTC else item.datetime).day:
-                bucket.append(item)
-            else:
-                yield start_date, bucket
-                bucket = []
-                start_date = item.datetime
-                if UTC:
-                    start_date -= start_date.utcoffset()
-                d = start_date.day
-                bucket.append(item)
-        if bucket:
-            yield start_date, bucket
+            tuple (datetime, Events): The start date for this bucket and
+                this bucket's Loot objects, which are built as they are read
+        '''
+        return self.merge_buckets(False, UTC, filters)
     
-    def totals_by_day(self, sales_loss=False, UTC=False, **filters):
+    def group_by_hour(self, UTC=False, **filters):
         '''
-        Adds up all the events in each daily bucket from group_by_day.
+        Yields buckets of Loot events separated by hour.
         Parameters:
-            sales_loss (bool): whether to show the sold items in the results
-            UTC (bool): whether to separate buckets by local calendar day
-                or by UTC calendar day
+            UTC (bool): whether to separate buckets by local hour or by UTC hour
             **filters (unpacked dict): the desired filters
         Yields:
-            tuple (datetime, dict, dict): The start date for this bucket,
-                a dictionary of gain loot events and their values, and
-                a dictionary of loss loot events and their values
+            tuple (datetime, Events): The start date for this bucket and
+                this bucket's Loot objects, which are built as they are read
         '''
-        for d, bucket in self.group_by_day(UTC=UTC, **filters):
-            gains = {}
-            losses = {}
-            for item in bucket:
-                gains[item.gain_item] = gains.get(item.gain_item, 0) + item.gain_value
-                if not item.gain_item or sales_loss:
-                    losses[item.loss_item] = losses.get(item.loss_item, 0) + item.loss_value
-            if '' in gains:
-                gains.pop('')
-            if '' in losses:
-                losses.pop('')
-            yield d, gains, losses
+        return self.merge_buckets(True, UTC, filters)
     
-    def cumulative_totals(self, sales_loss=False, UTC=False, **filters):
+    def merge_buckets(self, hourly, UTC, filters):
+        '''
+        Merges the buckets of every part, joining those that fall on the
+        same day or hour.
+        Parameters:
+            hourly (bool): whether buckets are hours rather than days
+            UTC (bool): whether buckets are UTC days or hours
+            filters (dict): the desired filters
+        Yields:
+            tuple (datetime, Events): each bucket's start date and events
+        '''
+        buckets = heapq.merge(*(part.bucket_rows(hourly, UTC, **filters) for part in self.parts),
+                              key=operator.itemgetter(0))
+        for number,group in itertools.groupby(buckets, operator.itemgetter(0)):
+            group = list(group)
+            yield (min(start_date for number,start_date,table,rows in group),
+                   Events(*((table, rows) for number,start_date,table,rows in group)))
+    
+    def daily_totals(self, sales_loss=False, UTC=False, **filters):
         '''
-        Yields the cumulative totals for each successive daily bucket from totals_by_day.
+        Adds up the matching loot events for each day.
         Parameters:
             sales_loss (bool): whether to show the sold items in the results
             UTC (bool): whether to separate buckets by local calendar day
                 or by UTC calendar day
             **filters (unpacked dict): the desired filters
-        Yields:
-            tuple (datetime, Counter): The start date for this bucket, and
-                a Counter holding the current cumulative total
+        Returns:
+            DailyTotals: the totals for each day
         '''
-        count = collections.Counter()
-        for d, gains, losses in self.totals_by_day(UTC=UTC, **filters):
-            count.update(gains)
-            count.update(losses)
-            yield d, count
+        return DailyTotals.merged([part.daily_totals(sales_loss=sales_loss, UTC=UTC, **filters)
+                                   for part in self.parts], sales_loss=sales_loss, UTC=UTC)
     
-    def average_totals(self, sales_loss=False, UTC=False, **filters):
+    def hourly_totals(self, sales_loss=False, UTC=False, **filters):
         '''
-        Returns a dictionary with the average daily value for each matching item.
+        Adds up the matching loot events for each hour.
         Parameters:
             sales_loss (bool): whether to show the sold items in the results
-            UTC (bool): whether to separate buckets by local calendar day
-                or by UTC calendar day
+            UTC (bool): whether to separate buckets by local hour or by UTC hour
             **filters (unpacked dict): the desired filters
         Returns:
-            dict: the matching items with their average daily value
+            DailyTotals: the totals for each hour
         '''
-        length = 0
-        for d, count in self.cumulative_totals(UTC=UTC, **filters):
-            length += 1
-        if length:
-            return {k:v//length for k,v in count.items()}
-        else:
-            return {'None':0}
+        return DailyTotals.merged([part.hourly_totals(sales_loss=sales_loss, UTC=UTC, **filters)
+                                   for part in self.parts], sales_loss=sales_loss, UTC=UTC,
+                                  hourly=True)
+    
+    totals_by_day = Container.totals_by_day
+    cumulative_totals = Container.cumulative_totals
+    average_totals = Container.average_totals
+    common = Container.common
     
     def counter(self, **filters):
         '''
@@ -343,40 +3002,61 @@ class Container:
         Returns:
             Counter: each item with their number of appearances
         '''
-        return collections.Counter(val for item in self.get_loot(**filters)
-                                    for val in (item.loss_item, item.gain_item) if val)
-        
-    def common(self, least=False, counter=None, **filters):
+        counts = collections.Counter()
+        for part in self.parts:
+            counts.update(part.counter(**filters))
+        return counts
+    
+    def dabo(self, sessions=None, **filters):
         '''
-        Returns the most or least common item, by number of loot events.
+        Yields each Dabo bet with its result, pairing bets within each part.
         Parameters:
-            least (bool): get the least common item, rather than the default most
-            counter (Counter): send a Counter object to avoid having to make it again
+            sessions (DaboSessions): adds up the pairs into sessions, which
+                are complete once every pair has been yielded, or None
+            **filters (unpacked dict): the desired filters
+        Yields:
+            tuple (Loot, Loot): each bet and its win or loss, in time order
+        '''
+        gap = DaboSessions.gap if sessions is None else sessions.gap
+        parts = [DaboSessions(gap) for part in self.parts]
+        yield from heapq.merge(*(part.dabo(part_sessions, **filters)
+                                 for part,part_sessions in zip(self.parts, parts)),
+                               key=lambda pair: pair[0].timestamp)
+        if sessions is not None:
+            sessions.merge(parts)
+    
+    def dabo_sessions(self, gap=None, **filters):
+        '''
+        Adds up Dabo gambling into sessions, separately for each part.
+        Parameters:
+            gap (int): the most seconds between bets in one session,
+                or None for DaboSessions.gap
             **filters (unpacked dict): the desired filters
         Returns:
-            str: the most or least common item, by number of loot events
+            DaboSessions: the sessions of every part, by start time
         '''
-        if counter:
-            return counter.most_common()[-1*least]
-        return self.counter(**filters).most_common()[-1*least]
+        sessions = DaboSessions() if gap is None else DaboSessions(gap)
+        sessions.merge([part.dabo_sessions(gap, **filters) for part in self.parts])
+        return sessions
     
-    def dabo(self, **filters):
+    def report(self, name, sales_loss=False, UTC=False, **filters):
         '''
-        Returns a zip object with Dabo gambling losses and gains.
-        Parameter:
+        Builds one of the standard reports, for write_report or export_report.
+        The rows are computed as they are read.
+        Parameters:
+            name (str): 'averages', 'totals', 'cumulative', 'winners', 'dabo'
+                or 'sessions'
+            sales_loss (bool): whether the daily reports count sales as losses
+            UTC (bool): whether the daily reports use UTC days
             **filters (unpacked dict): the desired filters
         Returns:
-            zip: Each loss and its corresponding gain for Dabo gambling
+            tuple (list, iter): the name of each column and the rows
         '''
-        filters['interaction'] = {"didn't win any", 'placed a bet of', 'won'}
-        gained = []
-        lost = []
-        for item in self.get_loot(**filters):
-            if item.gain_item:
-                gained.append(item)
-            else:
-                lost.append(item)
-        return zip(lost, gained)
+        if name == 'winners':
+            reports = [part.report(name, **filters) for part in self.parts]
+            return (['Date', 'Winner', 'Item'],
+                    heapq.merge(*(rows for headers,rows in reports), key=operator.itemgetter(0)))
+        return Container.report(self, name, sales_loss=sales_loss, UTC=UTC, **filters)
     
     def __str__(self):
         return '\n'.join(str(item) for item in self)
@@ -384,8 +3064,737 @@ class Container:
     def __repr__(self):
         return str(self)
 
+class Events:
+    '''
+    The Loot events of one bucket from group_by_day or group_by_hour. It
+    holds the rows of the tables the events are in, and builds each Loot
+    object as it is read.
+    Attributes:
+        segments (tuple): a (LootTable, rows) pair for each table
+    '''
+    def __init__(self, *segments):
+        self.segments = segments
+    
+    def __len__(self):
+        return sum(len(rows) for table,rows in self.segments)
+    
+    def __iter__(self):
+        '''
+        Returns an iterator over the bucket's Loot objects.
+        Returns:
+            iter: an iterator of the events, in time order
+        '''
+        if len(self.segments) == 1:
+            (table, rows), = self.segments
+            return map(table.__getitem__, rows)
+        return heapq.merge(*(map(table.__getitem__, rows) for table,rows in self.segments),
+                           key=operator.attrgetter('timestamp'))
+    
+    def __getitem__(self, idx):
+        '''
+        Returns the Loot object at a position in the bucket. A bucket
+        from several tables is read up to that position.
+        Parameter:
+            idx (int): the position
+        Returns:
+            Loot: the event
+        '''
+        if len(self.segments) == 1:
+            (table, rows), = self.segments
+            return table[rows[idx]]
+        return list(self)[idx]
+    
+    def __repr__(self):
+        return repr(list(self))
+
+class Buckets:
+    '''
+    The daily or hourly buckets of a Container, View or Chain, as returned by
+    by_day and by_hour. Nothing is computed until it is read, and the totals
+    are the source's (cached) daily_totals or hourly_totals.
+    Example:
+        container.where(gain_item='Dilithium Ore').by_day().totals()
+    Attributes:
+        source (Container, View or Chain): the events
+        hourly (bool): whether each bucket is an hour rather than a day
+        UTC (bool): whether buckets are UTC days or hours
+    '''
+    def __init__(self, source, hourly=False, UTC=False):
+        self.source = source
+        self.hourly = hourly
+        self.UTC = UTC
+    
+    def totals(self, sales_loss=False):
+        '''
+        Adds up the events in each bucket.
+        Parameter:
+            sales_loss (bool): whether to show the sold items in the results
+        Returns:
+            DailyTotals: the totals for each bucket
+        '''
+        totals = self.source.hourly_totals if self.hourly else self.source.daily_totals
+        return totals(sales_loss=sales_loss, UTC=self.UTC)
+    
+    def cumulative(self, sales_loss=False):
+        '''
+        Yields the running totals after each bucket.
+        Parameter:
+            sales_loss (bool): whether to show the sold items in the results
+        Yields:
+            tuple (datetime, Counter): the start date for this bucket, and
+                a Counter holding the current cumulative total
+        '''
+        yield from self.totals(sales_loss).cumulative()
+    
+    def averages(self, sales_loss=False):
+        '''
+        Returns the average value per bucket for each item.
+        Parameter:
+            sales_loss (bool): whether to show the sold items in the results
+        Returns:
+            dict: each item with its average value per bucket
+        '''
+        return self.totals(sales_loss).averages()
+    
+    def __iter__(self):
+        '''
+        Returns an iterator over the buckets' events.
+        Returns:
+            iter: an iterator of (datetime, Events) tuples
+        '''
+        group = self.source.group_by_hour if self.hourly else self.source.group_by_day
+        return group(UTC=self.UTC)
+
+class DailyTotals:
+    '''
+    The gain and loss totals of a series of Loot events for each day,
+    from which the cumulative totals and daily averages are derived.
+    Events can be added one at a time, in chronological order, to keep
+    the totals up to date.
+    Attributes:
+        days (list): a tuple (datetime, dict, dict) for each day, holding
+            the start date, the gained items and their values, and the
+            lost items and their values
+        sales_loss (bool): whether sold items are counted as losses
+        UTC (bool): whether days are UTC calendar days rather than local ones
+        hourly (bool): whether each bucket is an hour rather than a day
+    '''
+    def __init__(self, sales_loss=False, UTC=False, hourly=False):
+        self.days = []
+        self.sales_loss = sales_loss
+        self.UTC = UTC
+        self.hourly = hourly
+        self.current = None
+    
+    def add(self, loot):
+        '''
+        Adds a single Loot event to the totals.
+        Parameter:
+            loot (Loot): the event, no earlier than any already added
+        '''
+        table = LootTable()
+        table.append(loot)
+        self.add_rows(table, range(1))
+    
+    def add_rows(self, table, rows):
+        '''
+        Adds rows of a LootTable to the totals in one pass.
+        Parameters:
+            table (LootTable): the table holding the events
+            rows (iterable): the index of each row to add, in chronological order
+        '''
+        timestamp = table.timestamp
+        gain_item = table.gain_item
+        gain_value = table.gain_value
+        loss_item = table.loss_item
+        loss_value = table.loss_value
+        strings = table.strings
+        sales_loss = self.sales_loss
+        UTC = self.UTC
+        number = hour_number if self.hourly else day_number
+        current = self.current
+        if self.days:
+            d, gains, losses = self.days[-1]
+        for row in rows:
+            day = number(timestamp[row], UTC)
+            if day != current:
+                current = day
+                gains = {}
+                losses = {}
+                self.days.append((day_start(timestamp[row], UTC), gains, losses))
+            gain = strings[gain_item[row]]
+            if gain:
+                gains[gain] = gains.get(gain, 0) + gain_value[row]
+            loss = strings[loss_item[row]]
+            if loss and (not gain or sales_loss):
+                losses[loss] = losses.get(loss, 0) + loss_value[row]
+        self.current = current
+    
+    @classmethod
+    def merged(cls, parts, sales_loss=False, UTC=False, hourly=False):
+        '''
+        Combines the totals of several sets of events, adding up the buckets
+        that fall on the same day or hour.
+        Parameters:
+            parts (list): the DailyTotals to combine
+            sales_loss (bool): whether sold items are counted as losses
+            UTC (bool): whether days are UTC calendar days
+            hourly (bool): whether each bucket is an hour rather than a day
+        Returns:
+            DailyTotals: the combined totals
+        '''
+        temp = cls(sales_loss=sales_loss, UTC=UTC, hourly=hourly)
+        number = hour_number if hourly else day_number
+        def bucket(day):
+            # a bucket's label is the time of its first event, in UTC's wall clock
+            # for UTC buckets, so the event's timestamp can be recovered from it
+            d = day[0]
+            if UTC:
+                timestamp = ((d.replace(tzinfo=None) - datetime.datetime(1970, 1, 1))
+                             // datetime.timedelta(seconds=1))
+            else:
+                timestamp = int(d.timestamp())
+            return number(timestamp, UTC)
+        days = heapq.merge(*(part.days for part in parts), key=bucket)
+        for current,group in itertools.groupby(days, bucket):
+            d, gains, losses = next(group)
+            gains = dict(gains)
+            losses = dict(losses)
+            for day in group:
+                d = min(d, day[0])
+                for totals,more in zip((gains, losses), day[1:]):
+                    for k,v in more.items():
+                        totals[k] = totals.get(k, 0) + v
+            temp.days.append((d, gains, losses))
+            temp.current = current
+        return temp
+    
+    def __iter__(self):
+        '''
+        Returns an iterator over the daily totals.
+        Returns:
+            iter: an iterator of (datetime, dict, dict) tuples
+        '''
+        return iter(self.days)
+    
+    def __len__(self):
+        return len(self.days)
+    
+    def combined(self):
+        '''
+        Yields each day's gains and losses together.
+        Yields:
+            tuple (datetime, Counter): the start date for this day and
+                its gains updated with its losses
+        '''
+        for d, gains, losses in self.days:
+            result = collections.Counter(gains)
+            result.update(losses)
+            yield d, result
+    
+    def cumulative(self):
+        '''
+        Yields the running totals after each day.
+        Yields:
+            tuple (datetime, Counter): the start date for this day, and
+                a Counter holding the current cumulative total
+        '''
+        count = collections.Counter()
+        for d, gains, losses in self.days:
+            count.update(gains)
+            count.update(losses)
+            yield d, count
+    
+    def averages(self):
+        '''
+        Returns the average daily value for each item.
+        Returns:
+            dict: each item with its average value per day
+        '''
+        if not self.days:
+            return {'None':0}
+        count = collections.Counter()
+        for d, gains, losses in self.days:
+            count.update(gains)
+            count.update(losses)
+        length = len(self.days)
+        return {k:v//length for k,v in count.items()}
+    
+    def headers(self):
+        '''
+        Returns every item that appears in the totals.
+        Returns:
+            list: the items, sorted
+        '''
+        headers = set()
+        for d, gains, losses in self.days:
+            headers.update(gains, losses)
+        return sorted(headers)
+
+class DaboSession:
+    '''
+    The totals of one session of Dabo gambling.
+    Attributes:
+        start (int): the epoch second of the first bet
+        end (int): the epoch second of the last result
+        bets (int): the number of bets with a result
+        wagered (int): the total of those bets
+        payout (int): the total won
+        wins (int): the number of winning bets
+        streak (int): the current run of wins, or of losses if negative
+        longest_win (int): the longest run of wins
+        longest_loss (int): the longest run of losses
+    '''
+    def __init__(self, start):
+        self.start = self.end = start
+        self.bets = self.wagered = self.payout = self.wins = 0
+        self.streak = self.longest_win = self.longest_loss = 0
+    
+    @property
+    def net(self):
+        '''
+        The payout less the wagers.
+        '''
+        return self.payout - self.wagered
+    
+    def add(self, wager, payout, end):
+        '''
+        Adds a settled bet to the session.
+        Parameters:
+            wager (int): the amount bet
+            payout (int): the amount won, or 0 for a loss
+            end (int): the epoch second of the result
+        '''
+        self.bets += 1
+        self.wagered += wager
+        self.payout += payout
+        self.end = end
+        if payout:
+            self.wins += 1
+            self.streak = self.streak + 1 if self.streak > 0 else 1
+            self.longest_win = max(self.longest_win, self.streak)
+        else:
+            self.streak = self.streak - 1 if self.streak < 0 else -1
+            self.longest_loss = max(self.longest_loss, -self.streak)
+    
+    def __repr__(self):
+        return 'DaboSession({} bets, net {} from {})'.format(self.bets, self.net,
+                                                           local_datetime(self.start))
+
+class DaboSessions:
+    '''
+    Pairs each Dabo bet with the next result, reading the events in
+    chronological order, and adds the pairs up into sessions as it goes,
+    so nothing but the current bet is held. A bet followed by another bet,
+    or a result with no bet before it, is counted as unmatched, as is a
+    result that comes more than gap seconds after its bet. Rows can be
+    given a batch at a time, as long as each batch is later than the last.
+    Attributes:
+        gap (int): the most seconds from a result to the next bet of the
+            same session, and from a bet to its result
+        sessions (list): a DaboSession for each session so far
+        pending (int): the row of the bet awaiting its result, or None
+        table (LootTable): the table the pending bet is in
+        unmatched (int): the number of bets and results without a partner
+    '''
+    interactions = ('placed a bet of', 'won', "didn't win any")
+    gap = 1800
+    
+    def __init__(self, gap=None):
+        if gap is not None:
+            self.gap = gap
+        self.sessions = []
+        self.pending = None
+        self.table = None
+        self.unmatched = 0
+    
+    def merge(self, others):
+        '''
+        Adds the sessions of other DaboSessions, such as those of other
+        characters, keeping the sessions in order of their start.
+        Parameter:
+            others (list): the DaboSessions to add
+        '''
+        self.sessions = sorted(itertools.chain(self.sessions,
+                                               *(other.sessions for other in others)),
+                               key=operator.attrgetter('start'))
+        self.unmatched += sum(other.unmatched for other in others)
+    
+    def pairs(self, table, rows):
+        '''
+        Pairs bets and results from rows of a table, adding each pair to
+        the sessions as it is yielded.
+        Parameters:
+            table (LootTable): the table holding the events
+            rows (iterable): the rows of the Dabo events, in chronological order
+        Yields:
+            tuple (int, int): the rows of each bet and its result
+        '''
+        bet_code = table.codes.get(self.interactions[0])
+        result_codes = {table.codes.get(name) for name in self.interactions[1:]} - {None}
+        timestamp = table.timestamp
+        interaction = table.interaction
+        gain_value = table.gain_value
+        loss_value = table.loss_value
+        if self.table is not table and self.pending is not None:
+            self.pending = None
+            self.unmatched += 1
+        self.table = table
+        pending = self.pending
+        for row in rows:
+            code = interaction[row]
+            if code == bet_code:
+                if pending is not None:
+                    self.unmatched += 1
+                pending = row
+            elif code in result_codes:
+                if pending is None or timestamp[row] - timestamp[pending] > self.gap:
+                    self.unmatched += 1 + (pending is not None)
+                else:
+                    start = timestamp[pending]
+                    if not self.sessions or start - self.sessions[-1].end > self.gap:
+                        self.sessions.append(DaboSession(start))
+                    self.sessions[-1].add(-loss_value[pending], gain_value[row], timestamp[row])
+                    self.pending = None
+                    yield pending, row
+                pending = None
+        self.pending = pending
+    
+    def __iter__(self):
+        '''
+        Returns an iterator over the sessions.
+        Returns:
+            iter: an iterator of DaboSession objects, in order
+        '''
+        return iter(self.sessions)
+    
+    def __len__(self):
+        return len(self.sessions)
+
+class Rollup:
+    '''
+    Totals of a LootTable's events for each local and UTC day, and
+    optionally each hour, so that daily totals can be read in time
+    proportional to the number of days rather than the number of events.
+    Within each bucket, events are added up by their interaction,
+    gained item and lost item, which are all the filters it can answer.
+    Rows are added in chronological order as the table grows.
+    Attributes:
+        hourly (bool): whether hours are kept as well as days
+        zone (str): the timezone that local days and hours are in
+        buckets (dict): for each bucketing, keyed by (hourly, UTC), each bucket
+            number mapped to a dict of (interaction, gain_item, loss_item) codes
+            mapped to [event count, gain total, loss total, first row]
+        spans (dict): for each bucketing, each bucket number mapped to
+            [first row, one past the last row]
+        ordered (dict): for each bucketing, whether no row has fallen in
+            an earlier bucket than the row before it, which can happen
+            when the clocks go back over midnight
+        last (dict): for each bucketing, the bucket of the last row added
+    '''
+    filters = frozenset(('item', 'regex', 'interaction', 'gain_item', 'loss_item',
+                         'min_date', 'max_date'))
+    bucketings = ((False, False), (False, True), (True, False), (True, True))
+    span_types = 'qqq'
+    total_types = 'qiiiqqqq'
+    
+    def __init__(self, hourly=False):
+        self.hourly = hourly
+        self.zone = zone_name()
+        bucketings = self.bucketings if hourly else self.bucketings[:2]
+        self.buckets = {bucketing:{} for bucketing in bucketings}
+        self.spans = {bucketing:{} for bucketing in bucketings}
+        self.ordered = dict.fromkeys(bucketings, True)
+        self.last = dict.fromkeys(bucketings)
+    
+    def add_rows(self, table, start=0):
+        '''
+        Adds the rows at the end of a table to the totals, using
+        NumPy when it is available and there are enough of them.
+        Parameters:
+            table (LootTable): the table, in chronological order
+            start (int): the first row to add
+        '''
+        stop = len(table)
+        if stop - start > 1000 and numpy_present:
+            self.add_arrays(table, start, stop)
+            return
+        timestamp = table.timestamp
+        interaction = table.interaction
+        gain_item = table.gain_item
+        gain_value = table.gain_value
+        loss_item = table.loss_item
+        loss_value = table.loss_value
+        for row in range(start, stop):
+            key = (interaction[row], gain_item[row], loss_item[row])
+            for bucketing in self.buckets:
+                hourly, UTC = bucketing
+                bucket = (hour_number if hourly else day_number)(timestamp[row], UTC)
+                last = self.last[bucketing]
+                if last is not None and bucket < last:
+                    self.ordered[bucketing] = False
+                self.last[bucketing] = bucket
+                self.merge(bucketing, bucket, key, 1, gain_value[row], loss_value[row], row, row)
+    
+    def add_arrays(self, table, start, stop):
+        '''
+        Adds a slice of rows to the totals with NumPy, grouping them by
+        bucket and codes so that only each group is merged one at a time.
+        Parameters:
+            table (LootTable): the table, in chronological order
+            start (int): the first row to add
+            stop (int): one past the last row to add
+        '''
+        timestamp = as_numpy(table.timestamp)[start:stop]
+        codes = [as_numpy(getattr(table, column))[start:stop]
+                 for column in ('interaction', 'gain_item', 'loss_item')]
+        values = [as_numpy(getattr(table, column))[start:stop]
+                  for column in ('gain_value', 'loss_value')]
+        hours, inverse = numpy.unique(timestamp // 3600, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        hour_offsets = [hour_offset(hour) for hour in hours.tolist()]
+        offsets = numpy.array([offset or 0 for offset in hour_offsets], numpy.int64)[inverse]
+        for index,offset in enumerate(hour_offsets):
+            if offset is None:
+                # the clocks change during this hour
+                changing = numpy.flatnonzero(inverse == index)
+                offsets[changing] = [utc_offset(second) for second in timestamp[changing].tolist()]
+        local = timestamp + offsets
+        for bucketing in self.buckets:
+            hourly, UTC = bucketing
+            numbers = (timestamp if UTC else local) // (3600 if hourly else 86400)
+            last = self.last[bucketing]
+            if (numbers[1:] < numbers[:-1]).any() or (last is not None and numbers[0] < last):
+                self.ordered[bucketing] = False
+            self.last[bucketing] = int(numbers[-1])
+            order = numpy.lexsort((*reversed(codes), numbers))
+            keys = [numbers[order], *(column[order] for column in codes)]
+            changed = numpy.zeros(len(order), bool)
+            changed[0] = True
+            for column in keys:
+                changed[1:] |= column[1:] != column[:-1]
+            starts = numpy.flatnonzero(changed)
+            groups = [column[starts] for column in keys]
+            groups.append(numpy.diff(numpy.append(starts, len(order))))
+            groups.extend(numpy.add.reduceat(column[order], starts) for column in values)
+            groups.append(numpy.minimum.reduceat(order, starts) + start)
+            groups.append(numpy.maximum.reduceat(order, starts) + start)
+            for bucket, interaction, gain, loss, *totals in zip(*map(numpy.ndarray.tolist, groups)):
+                self.merge(bucketing, bucket, (interaction, gain, loss), *totals)
+    
+    def merge(self, bucketing, bucket, key, count, gain, loss, first, last):
+        '''
+        Adds a group of events to a bucket's totals.
+        Parameters:
+            bucketing (tuple): (hourly, UTC)
+            bucket (int): the bucket number
+            key (tuple): the interaction, gain_item and loss_item codes
+            count (int): the number of events
+            gain (int): their total gain_value
+            loss (int): their total loss_value
+            first (int): the first of their rows
+            last (int): the last of their rows
+        '''
+        entries = self.buckets[bucketing].get(bucket)
+        if entries is None:
+            entries = self.buckets[bucketing][bucket] = {}
+            self.spans[bucketing][bucket] = [first, last + 1]
+        else:
+            span = self.spans[bucketing][bucket]
+            span[0] = min(span[0], first)
+            span[1] = max(span[1], last + 1)
+        entry = entries.get(key)
+        if entry is None:
+            entries[key] = [count, gain, loss, first]
+        else:
+            entry[0] += count
+            entry[1] += gain
+            entry[2] += loss
+            entry[3] = min(entry[3], first)
+    
+    def totals(self, table, filters, sales_loss=False, UTC=False, hourly=False):
+        '''
+        Builds the same DailyTotals that adding up the matching rows would.
+        Buckets wholly inside the date bounds are read from the rollup, and
+        only a bucket cut by a bound has its rows added up.
+        Parameters:
+            table (LootTable): the table the rollup was built from
+            filters (dict): the desired filters
+            sales_loss (bool): whether sold items are counted as losses
+            UTC (bool): whether buckets are UTC days or hours rather than local ones
+            hourly (bool): whether buckets are hours rather than days
+        Returns:
+            DailyTotals: the totals, or None if the rollup cannot answer
+                the filters
+        '''
+        bucketing = (hourly, UTC)
+        if (not self.filters.issuperset(filters) or bucketing not in self.buckets
+                or not self.ordered[bucketing]):
+            return None
+        columns = dict(filters)
+        extras = extra_filters(columns)
+        earliest = math.ceil((extras['min_date'] or earliest_date()).timestamp())
+        latest = math.floor((extras['max_date'] or current_date()).timestamp())
+        timestamp = table.timestamp
+        rows = range(bisect.bisect_left(timestamp, earliest),
+                     bisect.bisect_right(timestamp, latest))
+        tests, leftovers, items, both = table.string_tests(columns, extras['item'],
+                                                           extras['regex'])
+        positions = {'interaction':0, 'gain_item':1, 'loss_item':2}
+        tests = [(positions[columns[0]], allowed) for columns,allowed in tests]
+        matches = {}
+        def match(key):
+            found = matches.get(key)
+            if found is None:
+                found = matches[key] = (all(key[position] in allowed for position,allowed in tests)
+                                        and (items is None or key[1] in items or key[2] in items
+                                             or (both and not key[1] and not key[2])))
+            return found
+        strings = table.strings
+        result = DailyTotals(sales_loss=sales_loss, UTC=UTC, hourly=hourly)
+        spans = self.spans[bucketing]
+        for bucket,entries in self.buckets[bucketing].items():
+            first, stop = spans[bucket]
+            if stop <= rows.start or first >= rows.stop:
+                continue
+            if first < rows.start or stop > rows.stop:
+                utc = datetime.timezone.utc
+                edge = dict(filters,
+                            min_date=datetime.datetime.fromtimestamp(
+                                timestamp[max(first, rows.start)], utc),
+                            max_date=datetime.datetime.fromtimestamp(
+                                timestamp[min(stop, rows.stop) - 1], utc))
+                result.add_rows(table, table.select(**edge))
+                continue
+            found = sorted((entry[3], key, entry) for key,entry in entries.items() if match(key))
+            if not found:
+                continue
+            gains = {}
+            losses = {}
+            for row,key,entry in found:
+                gain = strings[key[1]]
+                if gain:
+                    gains[gain] = gains.get(gain, 0) + entry[1]
+                loss = strings[key[2]]
+                if loss and (not gain or sales_loss):
+                    losses[loss] = losses.get(loss, 0) + entry[2]
+            result.days.append((day_start(timestamp[found[0][0]], UTC), gains, losses))
+            result.current = bucket
+        return result
+    
+    def write(self, output):
+        '''
+        Writes the rollup to the end of a file being saved by LootTable.save.
+        Parameter:
+            output (file): the file, opened for binary writing
+        '''
+        zone = self.zone.encode('utf-8')
+        counts = []
+        for bucketing in self.bucketings:
+            counts.append(len(self.spans.get(bucketing, ())))
+            counts.append(sum(map(len, self.buckets.get(bucketing, {}).values())))
+        output.write(bytes(-output.tell() % 8))
+        output.write(rollup_header.pack(len(zone), self.hourly,
+                                        *(self.ordered.get(bucketing, False)
+                                          for bucketing in self.bucketings), *counts))
+        output.write(zone)
+        for bucketing in self.buckets:
+            columns = [array.array(typecode) for typecode in self.span_types + self.total_types]
+            for bucket,(first, stop) in self.spans[bucketing].items():
+                for column,value in zip(columns, (bucket, first, stop)):
+                    column.append(value)
+            for bucket,entries in self.buckets[bucketing].items():
+                for key,entry in entries.items():
+                    for column,value in zip(columns[3:], (bucket, *key, *entry)):
+                        column.append(value)
+            for column in columns:
+                output.write(bytes(-output.tell() % 8))
+                output.write(column)
+    
+    @classmethod
+    def read(cls, buffer, offset, big):
+        '''
+        Reads a rollup written by write.
+        Parameters:
+            buffer (memoryview): the saved file
+            offset (int): where the columns of the table end
+            big (bool): whether the file's numbers are big-endian
+        Returns:
+            Rollup: the saved rollup
+        '''
+        offset += -offset % 8
+        zone_length, hourly, *fields = rollup_header.unpack_from(buffer, offset)
+        ordered = fields[:4]
+        counts = fields[4:]
+        offset += rollup_header.size
+        self = cls(hourly)
+        self.zone = str(buffer[offset:offset+zone_length], 'utf-8')
+        offset += zone_length
+        for idx,bucketing in enumerate(self.bucketings):
+            if bucketing not in self.buckets:
+                continue
+            self.ordered[bucketing] = ordered[idx]
+            columns = []
+            for position,typecode in enumerate(self.span_types + self.total_types):
+                column = array.array(typecode)
+                offset += -offset % 8
+                end = offset + counts[2*idx + (position >= 3)]*column.itemsize
+                column.frombytes(buffer[offset:end])
+                if big != (sys.byteorder == 'big'):
+                    column.byteswap()
+                columns.append(column)
+                offset = end
+            buckets = self.buckets[bucketing]
+            spans = self.spans[bucketing]
+            for bucket, first, stop in zip(*columns[:3]):
+                buckets[bucket] = {}
+                spans[bucket] = [first, stop]
+                self.last[bucketing] = bucket
+            for bucket, code, gain_code, loss_code, *entry in zip(*columns[3:]):
+                buckets[bucket][code, gain_code, loss_code] = entry
+        return self
+
 class Loot:
-    def __init__(self, d, t, interaction, winner, quantity, item, cp=False):
+    # where the event came from: the saved log it was parsed from, or the
+    # pasted log, named after its character; and the byte offset of its line
+    # in that log. Events that were not parsed from a log have neither.
+    source = ''
+    offset = 0
+    
+    @classmethod
+    def from_fields(cls, timestamp, interaction, winner, gain_item, gain_value,
+                    loss_item, loss_value, source='', offset=0):
+        '''
+        Builds a Loot object from already-parsed fields, such as a row of a LootTable.
+        Parameters:
+            timestamp (int): the event's time in epoch seconds
+            interaction (str): the interaction, such as 'received' or 'sold'
+            winner (str): the lockbox winner, if any
+            gain_item (str): the gained item, if any
+            gain_value (int): the gained quantity
+            loss_item (str): the lost item, if any
+            loss_value (int): the lost quantity
+            source (str): where the event came from, if known
+            offset (int): the offset of the event's line in that log, if known
+        Returns:
+            Loot: the event
+        '''
+        self = cls.__new__(cls)
+        self.timestamp = timestamp
+        self._datetime = None
+        self.winner = winner
+        self.interaction = interaction
+        self.gain_item = gain_item
+        self.gain_value = gain_value
+        self.loss_item = loss_item
+        self.loss_value = loss_value
+        if source:
+            self.source = source
+        if offset:
+            self.offset = offset
+        return self
+    
+    def __init__(self, d, t, interaction, winner, quantity, item, cp=False, year=None):
         if cp:
             if d:
                 month, day = map(int, d.strip('[] ').split('/'))
@@ -395,20 +3804,10 @@ class Loot:
                 hour, minute = map(int, t.strip('[] ').split(':'))
             else:
                 hour, minute = 0, 0
-            if tzlocal_present:
-                self.datetime = tzlocal.get_localzone().localize(
-                    datetime.datetime(year=year, month=month, day=day, hour=hour, minute=minute))
-            else:
-                self.datetime = datetime.datetime(year=year, month=month, day=day, hour=hour, minute=minute)
+            self.timestamp = hour_start(year or current_date().year, month, day, hour) + minute*60
         else:
-            if tzlocal_present:
-                #self.datetime = tzlocal.get_localzone().localize(datetime.datetime.strptime(d+t, '%Y%m%d%H%M%S'))
-                self.datetime = tzlocal.get_localzone().localize(datetime.datetime(year=int(d[:4]), month=int(d[4:6]),
-                    day=int(d[6:]), hour=int(t[:2]), minute=int(t[2:4]), second=int(t[4:])))
-            else:
-                #self.datetime = datetime.datetime.strptime(d+t, '%Y%m%d%H%M%S')
-                self.datetime = datetime.datetime(year=int(d[:4]), month=int(d[4:6]),
-                    day=int(d[6:]), hour=int(t[:2]), minute=int(t[2:4]), second=int(t[4:]))
+            self.timestamp = log_hour(d, t[:2]) + int(t[2:4])*60 + int(t[4:])
+        self._datetime = None
         
         self.winner = winner or ''
         
@@ -443,6 +3842,29 @@ class Loot:
             self.loss_item = ''
             self.loss_value = 0
     
+    @property
+    def datetime(self):
+        '''
+        The event's local date and time, built from its timestamp the
+        first time it is needed.
+        '''
+        if self._datetime is None:
+            self._datetime = local_datetime(self.timestamp)
+        return self._datetime
+    
+    @datetime.setter
+    def datetime(self, moment):
+        self.timestamp = int(moment.timestamp())
+        self._datetime = moment
+    
+    def __setstate__(self, state):
+        if 'datetime' in state:
+            # pickled by an older version, which stored only the datetime
+            moment = state.pop('datetime')
+            state['timestamp'] = int(moment.timestamp())
+            state['_datetime'] = moment
+        self.__dict__.update(state)
+    
     def __str__(self):
         if self.winner:
             return '{} won {}.'.format(self.winner, self.gain_item)
@@ -464,37 +3886,48 @@ class Loot:
 if __name__ == '__main__':
                 
     pasted = '*cp' in sys.argv
-    container = container_from_logs(location=sys.argv[1], cp=pasted)
+    workers = os.cpu_count() if '*parallel' in sys.argv else None
+    stats = Stats() if '*profile' in sys.argv else None
+    stage = stats.stage if stats else lambda name: contextlib.nullcontext()
+    container = container_from_logs(location=sys.argv[1], cp=pasted, workers=workers,
+                                    cache='*cache' in sys.argv, stats=stats)
+    container.stats = stats
+    if pasted:
+        for source,view in container.sources().items():
+            print('{}: {} events'.format(source, len(view)), file=sys.stderr)
     item_filter = {'Dilithium', 'Dilithium Ore', 'Refined Dilithium',
                'Contraband', 'Energy Credits', 'Gold-Pressed Latinum'}
+    reports = (('Daily averages:', 'averages', {'item':item_filter}),
+               ('Totals per day:', 'totals', {'item':item_filter}),
+               ('Dabo gambling results:', 'dabo', {}),
+               ('Lockbox ship winners:', 'winners', {}))
+    # a directory after the log location means the reports go to files there
+    exports = [arg for arg in sys.argv[2:] if not arg.startswith('*')]
+    form = 'json' if '*json' in sys.argv else 'tsv' if '*tsv' in sys.argv else 'csv'
+    if not exports:
+        sys.stdout.reconfigure(errors='replace')
+    
+    for idx,(title,name,filters) in enumerate(reports):
+        with stage(name):
+            headers, rows = container.report(name, **filters)
+            if exports:
+                location = os.path.join(exports[0], '{}.{}'.format(name, form))
+                count = export_report(location, headers, rows, form)
+                print('Wrote {} rows to {}'.format(count, location), file=sys.stderr)
+            else:
+                print('\n'*bool(idx) + title)
+                write_report(sys.stdout, headers, rows)
+    
+    if stats:
+        print(file=sys.stderr)
+        stats.report()
     
-    print('Daily averages:')
-    print('Item', 'Average value per day', sep='\t')
-    for item in container.average_totals(item=item_filter).items():
-        print(*item, sep='\t')
-    
-    print('\nTotals per day:')
-    headers = set()
-    results = []
-    for d,g,l in container.totals_by_day(item=item_filter):
-        result = collections.Counter(g)
-        result.update(l)
-        results.append((datetime.datetime.strftime(d, '%Y-%m-%d'), result))
-        headers |= set(result)
-    headers = sorted(headers)
-    print('Date', *headers, sep='\t')
-    for d,c in results:
-        print(d, *map(c.get, headers), sep='\t')
-    
-    print('\nDabo gambling results:')
-    print('Bet', 'Won', sep='\t')
-    for l,g in container.dabo():
-        print(l.loss_value, g.gain_value, sep='\t')
-    
-    print('\nLockbox ship winners:')
-    print('Date', 'Winner', 'Item', sep='\t')
-    for item in container.get_winners():
+    if '*follow' in sys.argv and not pasted:
+        print('\nFollowing new loot (Ctrl+C to stop):')
+        follower = LogFollower(sys.argv[1], container=container)
         try:
-            print(item.datetime, item.winner, item.gain_item, sep='\t')
-        except UnicodeEncodeError:
-            print('Character not available. Try redirecting to a file.')
+            for batch in follower.run():
+                for item in batch:
+                    print(item, flush=True)
+        except KeyboardInterrupt:
+            pass
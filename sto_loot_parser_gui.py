@@ -1,17 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog
+from tkinter import ttk
 import sto_loot_parser as stolp
 import os
 import datetime
-import collections
 import sys
-import pickle
-try:
-    import tzlocal
-except ImportError:
-    tzlocal_present = False
-else:
-    tzlocal_present = True
+import threading
+import queue
+import functools
+import time
+import traceback
 
 class STOLootParser:
     def __init__(self, parent):
@@ -26,16 +24,24 @@ class STOLootParser:
         self.filemenu = tk.Menu(self.menubar, tearoff=0)
         self.filemenu.add_command(label='Choose first log file...', command=self.ask_location)
         self.filemenu.add_command(label='Populate', command=self.populate)
+        self.filemenu.add_command(label='Cancel loading', command=self.cancel)
         self.filemenu.add_command(label='Save...', command=self.save)
         self.filemenu.add_command(label='Load...', command=self.load)
         self.menubar.add_cascade(label='File', menu=self.filemenu)
         
         self.exportmenu = tk.Menu(self.menubar, tearoff=0)
-        self.exportmenu.add_command(label='Average per day', command=self.average_per_day)
-        self.exportmenu.add_command(label='Totals by day', command=self.totals_by_day)
-        self.exportmenu.add_command(label='Cumulative totals by day', command=self.cumulative_totals)
-        self.exportmenu.add_command(label='Lockbox winners', command=self.get_winners)
-        self.exportmenu.add_command(label='Dabo losses/wins', command=self.dabo)
+        self.exportmenu.add_command(label='Average per day',
+                                    command=lambda: self.export('averages'))
+        self.exportmenu.add_command(label='Totals by day',
+                                    command=lambda: self.export('totals'))
+        self.exportmenu.add_command(label='Cumulative totals by day',
+                                    command=lambda: self.export('cumulative'))
+        self.exportmenu.add_command(label='Lockbox winners',
+                                    command=lambda: self.export('winners'))
+        self.exportmenu.add_command(label='Dabo losses/wins',
+                                    command=lambda: self.export('dabo'))
+        self.exportmenu.add_command(label='Dabo sessions',
+                                    command=lambda: self.export('sessions'))
         self.menubar.add_cascade(label='Export', menu=self.exportmenu)
         
         parent.config(menu=self.menubar)
@@ -52,35 +58,194 @@ class STOLootParser:
             val.grid(row=current_row, column=1)
             current_row += 1
         
+        self.progress = ttk.Progressbar(parent, maximum=1)
+        self.progress.grid(row=current_row, column=0, columnspan=2, sticky='ew')
+        current_row += 1
+        self.status = tk.Label(parent, text='No events loaded.')
+        self.status.grid(row=current_row, column=0, columnspan=2)
+        current_row += 1
+        
+        self.stats = stolp.Stats() if '*profile' in sys.argv else None
         self.container = stolp.Container()
+        self.container.stats = self.stats
+        # work for the UI thread, queued by the loading and export threads
+        self.tasks = queue.Queue()
+        self.loader = None
+        # the thread exporting or saving, which reads the Container
+        self.exporter = None
+        self.stop = threading.Event()
+        parent.after(100, self.poll)
     
     def ask_location(self):
         self.location = filedialog.askopenfilename()
         
     def populate(self):
-        self.container.extend(stolp.container_from_logs(self.location))
+        self.start_loading(self.load_logs)
+    
+    def start_loading(self, target, *args):
+        # a load waits until the last one's batches have all been added,
+        # since it is given the events loaded so far to merge with
+        if self.loader and self.loader.is_alive() or not self.tasks.empty():
+            return
+        self.stop.clear()
+        self.progress['value'] = 0
+        self.status['text'] = 'Loading...'
+        self.loader = threading.Thread(target=target, args=(self.container, *args), daemon=True)
+        self.loader.start()
+    
+    def cancel(self):
+        self.stop.set()
+    
+    def load_logs(self, previous):
+        # runs on the loading thread
+        # Events that were already loaded are merged with the new ones once
+        # those are parsed, dropping any loaded twice, rather than appended to.
+        # Until then the new ones are also added to a Container of the UI
+        # thread's own, which is shown after the loaded ones; with nothing
+        # loaded, they are simply added to the empty Container shown.
+        workers = os.cpu_count() if '*parallel' in sys.argv else None
+        fresh = stolp.Container() if previous else None
+        live = stolp.Container() if previous else previous
+        result = previous
+        if previous:
+            self.tasks.put(functools.partial(self.replace, previous + live))
+        try:
+            for batch,done,total in stolp.load_logs(self.location, workers=workers, cache=True,
+                                                    stats=self.stats, stop=self.stop):
+                fraction = done/total if total else 1
+                self.tasks.put(functools.partial(self.add_batch, live, batch, fraction))
+                if fresh is not None:
+                    fresh.extend(batch)
+            if fresh:
+                result = stolp.Container.merged([previous, fresh])
+        except Exception:
+            traceback.print_exc()
+        if previous:
+            self.tasks.put(functools.partial(self.replace, result))
+        self.tasks.put(self.finish_loading)
+    
+    def load_file(self, previous, location):
+        # runs on the loading thread
+        try:
+            try:
+                loaded = stolp.Container.load(location)
+            except ValueError:
+                # saved by an older version, which pickled the whole Container
+                loaded = stolp.Container.load_pickle(location)
+            if previous:
+                loaded = stolp.Container.merged([previous, loaded])
+        except Exception:
+            traceback.print_exc()
+        else:
+            self.tasks.put(functools.partial(self.replace, loaded))
+        self.tasks.put(self.finish_loading)
+    
+    def poll(self):
+        # Batches wait while an export or save is reading the Container, and
+        # only a short slice of time is spent on them so the window stays
+        # responsive.
+        if not (self.exporter and self.exporter.is_alive()):
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                try:
+                    task = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                task()
+        self.parent.after(50, self.poll)
+    
+    def add_batch(self, container, batch, fraction):
+        container.extend(batch)
+        self.show_progress(fraction, len(self.container))
+    
+    def show_progress(self, fraction, count):
+        self.progress['value'] = fraction
+        self.status['text'] = 'Loading... {:,} events'.format(count)
+    
+    def replace(self, container):
+        container.stats = self.stats
+        self.container = container
+    
+    def finish_loading(self):
+        if self.stop.is_set() and self.progress['value'] < 1:
+            self.status['text'] = 'Cancelled. {:,} events'.format(len(self.container))
+        else:
+            self.progress['value'] = 1
+            self.status['text'] = '{:,} events'.format(len(self.container))
+        # this is the loading thread's last task, so it is done with the Stats
+        self.loader.join()
+        self.print_stats()
+    
+    def export(self, name):
+        # the file and filters are asked for here because Tk may only be
+        # used from the UI thread
+        if self.exporter and self.exporter.is_alive():
+            return
+        location = filedialog.asksaveasfilename(defaultextension='.csv',
+                                                filetypes=[('CSV', '*.csv'), ('TSV', '*.tsv'),
+                                                           ('JSON', '*.json')])
+        if not location:
+            return
+        self.status['text'] = 'Exporting...'
+        self.exporter = threading.Thread(target=self.write_export,
+                                         args=(name, location, self.get_filters()), daemon=True)
+        self.exporter.start()
+    
+    def write_export(self, name, location, filters):
+        # runs on the export thread
+        try:
+            count = stolp.export_report(location, *self.container.report(name, **filters))
+        except Exception:
+            traceback.print_exc()
+            text = 'Export failed.'
+        else:
+            text = 'Wrote {:,} rows to {}'.format(count, os.path.basename(location))
+        self.tasks.put(functools.partial(self.status.config, text=text))
+        self.tasks.put(self.print_stats)
+    
+    def print_stats(self):
+        # runs on the UI thread; while a load is running it is still adding
+        # to the Stats, which are printed once it finishes instead
+        if self.stats and not (self.loader and self.loader.is_alive()):
+            print(file=sys.stderr)
+            self.stats.report()
+            self.stats.clear()
     
     def save(self):
+        # saved on the export thread, since building the rollup for the
+        # file can take a while
+        if self.exporter and self.exporter.is_alive():
+            return
         temp = filedialog.asksaveasfilename()
         if not temp:
             return
-        with open(temp, 'wb') as output:
-            pickle.dump(self.container, output)
+        self.status['text'] = 'Saving...'
+        self.exporter = threading.Thread(target=self.write_save, args=(self.container, temp),
+                                         daemon=True)
+        self.exporter.start()
+    
+    def write_save(self, container, location):
+        # runs on the export thread
+        try:
+            container.save(location)
+        except Exception:
+            traceback.print_exc()
+            text = 'Save failed.'
+        else:
+            text = 'Saved {:,} events to {}'.format(len(container), os.path.basename(location))
+        self.tasks.put(functools.partial(self.status.config, text=text))
         
     def load(self):
         temp = filedialog.askopenfilename()
         if not temp:
             return
-        with open(temp, 'rb') as f:
-            self.container.extend(pickle.load(f))
+        self.start_loading(self.load_file, temp)
         
     def get_filters(self):
         temp = {k.get():v.get() for k,v in self.filters}
         for var in ('min_date', 'max_date'):
             if var in temp:
-                temp[var] = datetime.datetime(*map(int, temp[var].split()))
-                if tzlocal_present:
-                    temp[var] = tzlocal.get_localzone().localize(temp[var])
+                temp[var] = stolp.localize(datetime.datetime(*map(int, temp[var].split())))
         if 'regex' not in temp:
             for var in ('gain_item', 'loss_item', 'item', 'winner', 'interaction'):
                 if var in temp and '|' in temp[var]:
@@ -92,74 +257,9 @@ class STOLootParser:
             temp.pop('')
             
         return temp
-    
-    def get_winners(self):
-        print('\nLockbox ship winners:')
-        print('Date', 'Winner', 'Item', sep='\t')
-        for item in self.container.get_winners(**self.get_filters()):
-            self.unicode_printer(item.datetime, item.winner, item.gain_item, sep='\t')
-            
-    def unicode_printer(self, *args, sep=' ', end='\n'):
-        *most, last = args
-        for arg in most:
-            try:
-                print(arg, end=sep)
-            except UnicodeEncodeError:
-                for c in arg:
-                    try:
-                        print(c, end='')
-                    except UnicodeEncodeError:
-                        print('?', end='')
-                print(end=sep, flush=True)
-        try:
-            print(last, end=end)
-        except UnicodeEncodeError:
-            for c in last:
-                try:
-                    print(c, end='')
-                except UnicodeEncodeError:
-                    print('?', end='')
-            print(end=end, flush=True)
-        
-    def totals_by_day(self):
-        headers = set()
-        results = []
-        for d,g,l in self.container.totals_by_day(**self.get_filters()):
-            result = collections.Counter(g)
-            result.update(l)
-            results.append((datetime.datetime.strftime(d, '%Y-%m-%d'), result))
-            headers |= set(result)
-        headers = sorted(headers)
-        print('\nTotals per day:')
-        self.unicode_printer('Date', *headers, sep='\t')
-        for d,c in results:
-            self.unicode_printer(d, *map(c.get, headers), sep='\t')
-    
-    def cumulative_totals(self):
-        headers = set()
-        results = []
-        for d,c in self.container.cumulative_totals(**self.get_filters()):
-            results.append((datetime.datetime.strftime(d, '%Y-%m-%d'), dict(c)))
-            headers |= set(c)
-        headers = sorted(headers)
-        print('\nCumulative totals per day:')
-        self.unicode_printer('Date', *headers, sep='\t')
-        for d,c in results:
-            self.unicode_printer(d, *map(c.get, headers), sep='\t')
-        
-    def dabo(self):
-        print('\nDabo gambling results:')
-        print('Bet', 'Won', sep='\t')
-        for l,g in self.container.dabo(**self.get_filters()):
-            print(l.loss_value, g.gain_value, sep='\t')
-    
-    def average_per_day(self):
-        print('\nDaily averages:')
-        print('Item', 'Average value per day', sep='\t')
-        for item in self.container.average_totals(**self.get_filters()).items():
-            self.unicode_printer(*item, sep='\t')
-            
 
-root = tk.Tk()
-parser = STOLootParser(root)
-root.mainloop()
\ No newline at end of file
+
+if __name__ == '__main__':
+    root = tk.Tk()
+    parser = STOLootParser(root)
+    root.mainloop()
\ No newline at end of file
@@ -0,0 +1,353 @@
+import os
+import sys
+import time
+import math
+import sqlite3
+import itertools
+import collections
+
+import sto_loot_parser as stolp
+
+schema = '''
+CREATE TABLE IF NOT EXISTS strings (code INTEGER PRIMARY KEY, string TEXT UNIQUE NOT NULL);
+INSERT OR IGNORE INTO strings VALUES (0, '');
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL,
+                                  offset INTEGER NOT NULL, tail BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS events (timestamp INTEGER NOT NULL, interaction INTEGER NOT NULL,
+                                   winner INTEGER NOT NULL, gain_item INTEGER NOT NULL,
+                                   gain_value INTEGER NOT NULL, loss_item INTEGER NOT NULL,
+                                   loss_value INTEGER NOT NULL, source INTEGER NOT NULL,
+                                   file INTEGER NOT NULL, offset INTEGER NOT NULL DEFAULT 0);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS events_gain_item ON events (gain_item, timestamp);
+CREATE INDEX IF NOT EXISTS events_loss_item ON events (loss_item, timestamp);
+CREATE INDEX IF NOT EXISTS events_interaction ON events (interaction, timestamp);
+CREATE INDEX IF NOT EXISTS events_winner ON events (winner, timestamp);
+CREATE INDEX IF NOT EXISTS events_source ON events (source, timestamp);
+CREATE INDEX IF NOT EXISTS events_file ON events (file);
+'''
+
+# Daily totals are added up in SQL for each quarter hour, the smallest
+# unit that every timezone's offset is a whole number of, so that no
+# quarter hour is split between two local days.
+QUARTER = 900
+
+class LootStore:
+    '''
+    A loot history kept in a SQLite database, so that years of logs can be
+    queried without loading them into memory. As in a LootTable, strings are
+    interned in a table of their own and the events hold their codes, so
+    string filters are compiled into sets of codes that the indexes answer.
+    Logs are imported a whole log per transaction, and a log that has already
+    been imported is skipped, or only has its new end imported if it has grown.
+    Attributes:
+        location (str): the location of the database
+        connection (Connection): the open database, in autocommit mode
+        strings (list): each distinct string, indexed by its code
+        codes (dict): each distinct string mapped to its code
+    '''
+    columns = stolp.LootTable.columns
+    string_columns = stolp.LootTable.string_columns
+    # filters are compiled exactly as a LootTable compiles them
+    string_tests = stolp.LootTable.string_tests
+    matching = stolp.LootTable.matching
+
+    def __init__(self, location):
+        self.location = location
+        self.connection = sqlite3.connect(location, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(schema)
+        if 'offset' not in [row[1] for row in self.connection.execute('PRAGMA table_info(events)')]:
+            # made before events kept the offset of their line in the log
+            self.connection.execute('ALTER TABLE events ADD COLUMN offset INTEGER NOT NULL DEFAULT 0')
+        self.load_strings()
+
+    def load_strings(self):
+        '''
+        Reads the string table from the database.
+        '''
+        self.strings = [string for string, in
+                        self.connection.execute('SELECT string FROM strings ORDER BY code')]
+        self.codes = {string:code for code,string in enumerate(self.strings)}
+
+    def intern(self, string):
+        '''
+        Returns the code for a string, adding it to the database if necessary.
+        Parameter:
+            string (str): the string to look up
+        Returns:
+            int: the string's code
+        '''
+        code = self.codes.get(string)
+        if code is None:
+            code = self.codes[string] = len(self.strings)
+            self.strings.append(string)
+            self.connection.execute('INSERT INTO strings VALUES (?, ?)', (code, string))
+        return code
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def job(self, filename, cp=False):
+        '''
+        Works out which part of a log still needs importing, the way
+        LogCache.job does.
+        Parameters:
+            filename (str): the location of the log
+            cp (bool): whether the log is pasted, in which case any change
+                means importing it again, since its years may have changed
+        Returns:
+            tuple (str, int, int): the log and the byte range to import,
+                or None if it has not changed
+        '''
+        size = os.path.getsize(filename)
+        found = self.connection.execute('SELECT offset, tail FROM files WHERE name = ?',
+                                        (os.path.abspath(filename),)).fetchone()
+        if found:
+            offset, tail = found
+            if offset <= size and stolp.LogCache.tail(filename, offset) == tail:
+                if offset == size:
+                    return None
+                if not cp:
+                    return filename, offset, size
+        return filename, 0, None if cp else size
+
+    def import_logs(self, location, cp=False, workers=None, stats=None):
+        '''
+        Parses logs into the database. Each log is imported in a single
+        transaction, so an interrupted import leaves no part of a log behind,
+        and a log that was changed other than by growing replaces its old events.
+        Parameters:
+            location (str or list): the location of the first chatlog in a series,
+                or for pasted logs, a location, a glob pattern or a list of either
+            cp (bool): whether to read pasted logs with the copy-paste syntax
+            workers (int): the number of processes that parse logs
+                in parallel, or None to parse them one at a time
+            stats (Stats): records where the parsing time went, or None
+        Yields:
+            tuple (str, int): the name of each log as it is imported,
+                and the number of events added from it
+        '''
+        files = stolp.paste_files(location) if cp else stolp.log_files(location)
+        jobs = {}
+        for filename in files:
+            job = self.job(filename, cp)
+            if job:
+                jobs[filename] = job
+        pieces = stolp.split_jobs(jobs.values(), cp)
+        remaining = collections.Counter(piece[0] for piece in pieces)
+        connection = self.connection
+        try:
+            for piece,result in stolp.parse_pieces(pieces, cp, workers, stats):
+                filename = piece[0]
+                name = os.path.abspath(filename)
+                if not connection.in_transaction:
+                    connection.execute('BEGIN')
+                    connection.execute('INSERT OR IGNORE INTO files VALUES (NULL, ?, 0, ?)',
+                                       (name, b''))
+                    file_id, = connection.execute('SELECT id FROM files WHERE name = ?',
+                                                  (name,)).fetchone()
+                    if not jobs[filename][1]:
+                        connection.execute('DELETE FROM events WHERE file = ?', (file_id,))
+                    count = 0
+                count += self.insert(result.bag, file_id)
+                remaining[filename] -= 1
+                if not remaining[filename]:
+                    filename, start, end = jobs[filename]
+                    offset = os.path.getsize(filename) if end is None else stolp.line_end(
+                        filename, start, end)
+                    connection.execute('UPDATE files SET offset = ?, tail = ? WHERE id = ?',
+                                       (offset, stolp.LogCache.tail(filename, offset), file_id))
+                    connection.execute('COMMIT')
+                    yield os.path.basename(filename), count
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+                self.load_strings()
+            raise
+
+    def insert(self, table, file_id):
+        '''
+        Adds the events of a LootTable to the database, in chronological order.
+        Parameters:
+            table (LootTable): the events
+            file_id (int): the id of the log they were parsed from
+        Returns:
+            int: the number of events added
+        '''
+        if not table.ordered:
+            table.sort()
+        mapping = [self.intern(string) for string in table.strings]
+        columns = [getattr(table, column) if column not in self.string_columns
+                   else map(mapping.__getitem__, getattr(table, column))
+                   for column in self.columns]
+        self.connection.executemany('INSERT INTO events ({}, file) VALUES ({})'.format(
+                                        ', '.join(self.columns), ', '.join('?'*(len(self.columns)+1))),
+                                    zip(*columns, itertools.repeat(file_id)))
+        return len(table)
+
+    def where(self, filters):
+        '''
+        Compiles filters into a WHERE clause, with the same defaults and
+        string semantics as LootTable.select. String filters become sets
+        of codes, so each regex runs once per distinct string.
+        Parameter:
+            filters (dict): the desired filters, as for Container.get_loot
+        Returns:
+            tuple (str, list, dict, bool): the clause, its parameters, the
+                filters that must be checked on each event, and regex
+        '''
+        filters = dict(filters)
+        extras = stolp.extra_filters(filters)
+        regex = extras['regex']
+        clauses = ['timestamp BETWEEN ? AND ?', 'gain_value BETWEEN ? AND ?',
+                   'loss_value BETWEEN ? AND ?']
+        params = [math.ceil((extras['min_date'] or stolp.earliest_date()).timestamp()),
+                  math.floor((extras['max_date'] or stolp.current_date()).timestamp()),
+                  extras['min_gain'], extras['max_gain'], extras['max_loss'], extras['min_loss']]
+        tests, leftovers, items, both = self.string_tests(filters, extras['item'], regex)
+        def within(column, codes):
+            return '{} IN ({})'.format(column, ','.join(map(str, sorted(codes))))
+        for (column,),codes in tests:
+            clauses.append(within(column, codes))
+        if items is not None:
+            clause = '{} OR {}'.format(within('gain_item', items), within('loss_item', items))
+            if both:
+                clause += ' OR (gain_item = 0 AND loss_item = 0)'
+            clauses.append('({})'.format(clause))
+        return ' AND '.join(clauses), params, leftovers, regex
+
+    def get_loot(self, **filters):
+        '''
+        Yields all the Loot objects that match the given set of filters,
+        reading them from the database as they are needed.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Yields:
+            Loot: each matching Loot item, in chronological order
+        '''
+        clause, params, leftovers, regex = self.where(filters)
+        strings = self.strings
+        for row in self.connection.execute('SELECT {} FROM events WHERE {} ORDER BY timestamp, rowid'
+                                           .format(', '.join(self.columns), clause), params):
+            (timestamp, interaction, winner, gain_item, gain_value, loss_item, loss_value,
+             source, offset) = row
+            loot = stolp.Loot.from_fields(timestamp, strings[interaction], strings[winner],
+                                          strings[gain_item], gain_value, strings[loss_item],
+                                          loss_value, strings[source], offset)
+            if not leftovers or stolp.LootTable.check(loot, leftovers, regex):
+                yield loot
+
+    def container(self, **filters):
+        '''
+        Loads the matching events into a Container, for the analyses
+        that the store does not answer itself.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Returns:
+            Container: the matching events
+        '''
+        temp = stolp.Container()
+        clause, params, leftovers, regex = self.where(filters)
+        if leftovers:
+            temp.bag.extend(self.get_loot(**filters))
+            return temp
+        table = temp.bag
+        table.strings = list(self.strings)
+        table.codes = dict(self.codes)
+        columns = [getattr(table, column) for column in self.columns]
+        for row in self.connection.execute('SELECT {} FROM events WHERE {} ORDER BY timestamp, rowid'
+                                           .format(', '.join(self.columns), clause), params):
+            for column,value in zip(columns, row):
+                column.append(value)
+        return temp
+
+    def daily_totals(self, sales_loss=False, UTC=False, **filters):
+        '''
+        Adds up the matching loot events for each day. The sums are taken
+        by SQL for each quarter hour and item, and only those are read.
+        Parameters:
+            sales_loss (bool): whether to show the sold items in the results
+            UTC (bool): whether to separate buckets by local calendar day
+                or by UTC calendar day
+            **filters (unpacked dict): the desired filters
+        Returns:
+            DailyTotals: the totals for each day
+        '''
+        totals = stolp.DailyTotals(sales_loss=sales_loss, UTC=UTC)
+        clause, params, leftovers, regex = self.where(filters)
+        if leftovers:
+            for loot in self.get_loot(**filters):
+                totals.add(loot)
+            return totals
+        groups = self.connection.execute(
+            'SELECT MIN(timestamp), MIN(rowid), gain_item, loss_item, SUM(gain_value), '
+            'SUM(loss_value) FROM events WHERE {} GROUP BY timestamp / {}, gain_item, loss_item '
+            'ORDER BY timestamp / {}'.format(clause, QUARTER, QUARTER), params)
+        strings = self.strings
+        day = []
+        for group in itertools.chain(groups, [None]):
+            if day and (group is None or stolp.day_number(group[0], UTC) != totals.current):
+                day.sort()
+                gains = {}
+                losses = {}
+                for first, row, gain_code, loss_code, gain_total, loss_total in day:
+                    gain = strings[gain_code]
+                    if gain:
+                        gains[gain] = gains.get(gain, 0) + gain_total
+                    loss = strings[loss_code]
+                    if loss and (not gain or sales_loss):
+                        losses[loss] = losses.get(loss, 0) + loss_total
+                totals.days.append((stolp.day_start(day[0][0], UTC), gains, losses))
+                day = []
+            if group is not None:
+                totals.current = stolp.day_number(group[0], UTC)
+                day.append(group)
+        return totals
+
+    # the same as the Container's, since they only read daily_totals
+    totals_by_day = stolp.Container.totals_by_day
+    cumulative_totals = stolp.Container.cumulative_totals
+    average_totals = stolp.Container.average_totals
+
+    def counter(self, **filters):
+        '''
+        Returns a Counter with the number of times each loot item appeared,
+        counted by SQL. Items are ordered by first appearance, losses before
+        gains; items first appearing in the same second are ordered by code.
+        Parameter:
+            **filters (unpacked dict): the desired filters
+        Returns:
+            Counter: each item with their number of appearances
+        '''
+        clause, params, leftovers, regex = self.where(filters)
+        if leftovers:
+            return collections.Counter(item for loot in self.get_loot(**filters)
+                                       for item in (loot.loss_item, loot.gain_item) if item)
+        counts = self.connection.execute(
+            'SELECT code, SUM(count) FROM ('
+            'SELECT loss_item AS code, COUNT(*) AS count, MIN(timestamp) * 2 AS first '
+            'FROM events WHERE {0} AND loss_item != 0 GROUP BY loss_item UNION ALL '
+            'SELECT gain_item, COUNT(*), MIN(timestamp) * 2 + 1 '
+            'FROM events WHERE {0} AND gain_item != 0 GROUP BY gain_item) '
+            'GROUP BY code ORDER BY MIN(first), code'.format(clause), params + params)
+        return collections.Counter({self.strings[code]:count for code,count in counts})
+
+if __name__ == '__main__':
+
+    store = LootStore(sys.argv[1])
+    if sys.argv[2:3] and not sys.argv[2].startswith('*'):
+        workers = os.cpu_count() if '*parallel' in sys.argv else None
+        start = time.perf_counter()
+        total = 0
+        print('Log', 'Events', sep='\t')
+        for name,count in store.import_logs(sys.argv[2], cp='*cp' in sys.argv, workers=workers):
+            print(name, count, sep='\t')
+            total += count
+        print('Total', total, sep='\t')
+        print('Seconds', round(time.perf_counter() - start, 1), sep='\t')
+    print('Events stored', len(store), sep='\t')
+    store.close()